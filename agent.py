@@ -4,27 +4,73 @@ import numpy as np
 
 class Agent:
     def __init__(self, x, y):
-        self.loc = [x, y]
+        self.world = None  # GridWorld the agent belongs to (set by GridWorld.create_agents)
+        self.agent_id = None  # Index of the agent in the team of the world
+        self._loc = [x, y]
         self.initial_position = (x, y)
         self.actions = [0, 1, 2, 3, 4]  # Up, Down, Left, Right, Stationary
 
+    @property
+    def loc(self):
+        """
+        [x, y] location of the agent. Agents in a GridWorld read their location from the world, so it always matches
+        the target occupancy rewards are calculated from
+        """
+        if self.world is None:
+            return self._loc
+        return self.world.get_agent_position(self.agent_id)
+
+    @loc.setter
+    def loc(self, loc):
+        if self.world is None:
+            self._loc = list(loc)
+        else:
+            self.world.move_agent(self.agent_id, loc)  # Moves the agent and updates target occupancy
+
     def reset_agent(self):
         """
         Reset the agent to its initial position
         """
-        self.loc[0] = self.initial_position[0]
-        self.loc[1] = self.initial_position[1]
+        self.loc = list(self.initial_position)
+
+
+def update_cached_rows(q_rows, max_q, greedy_actions, rows, actions, new_q):
+    """
+    Update the cached max q-value and greedy action of q-table rows after their (row, action) entries were written
+    with new_q. A row is only recomputed when the value of its greedy action decreases (rows must be unique)
+    """
+    new_q = np.asarray(new_q, dtype=max_q.dtype)  # Compare the values as they are stored in the q-table
+    old_max = max_q[rows]
+    old_greedy = greedy_actions[rows]
+    increased = (new_q > old_max) | ((new_q == old_max) & (actions < old_greedy))  # Ties go to the first action
+    decreased = (new_q < old_max) & (actions == old_greedy)
+
+    max_q[rows[increased]] = new_q[increased]
+    greedy_actions[rows[increased]] = actions[increased]
+    stale_rows = rows[decreased]
+    if len(stale_rows) > 0:
+        greedy_actions[stale_rows] = np.argmax(q_rows[stale_rows], axis=1)
+        max_q[stale_rows] = q_rows[stale_rows, greedy_actions[stale_rows]]
 
 
 class QLearner(Agent):
-    def __init__(self, n_states, x, y):
+    def __init__(self, n_states, x, y, q_table=None, q_cache=None):
         super().__init__(x, y)
         self.n_states = n_states
         self.n_actions = len(self.actions)
         self.discount = 0.9  # Discount factor (gamma)
         self.alpha = 0.1  # Learning rate
         self.epsilon = 0.15  # e-greedy
-        self.q_table = np.zeros((n_states, len(self.actions)))
+        if q_table is None:
+            self.q_table = np.zeros((n_states, len(self.actions)))
+        else:
+            self.q_table = q_table  # View into a team Q-table owned by a TeamQLearner
+        if q_cache is None:
+            self.max_q = np.zeros(n_states, dtype=self.q_table.dtype)  # Max q-value of each state
+            self.greedy_actions = np.zeros(n_states, dtype=np.int8)  # Greedy action of each state
+            self.rebuild_cache()
+        else:
+            self.max_q, self.greedy_actions = q_cache  # Views into the caches of a TeamQLearner
         self.current_state = None
         self.prev_state = None
         self.action = None
@@ -48,18 +94,28 @@ class QLearner(Agent):
         Update q-values after a state transition
         """
         q_val = self.q_table[self.prev_state, self.action]
-        max_q = np.max(self.q_table[self.current_state])
+        max_q = self.max_q[self.current_state]
 
         new_q = ((1-self.alpha)*q_val) + self.alpha*(reward + (self.discount*max_q) - q_val)
         self.q_table[self.prev_state, self.action] = new_q
 
+        # Update the cached max q-value and greedy action of the previous state
+        state = self.prev_state
+        new_q = self.q_table[state, self.action]
+        if new_q > self.max_q[state] or (new_q == self.max_q[state] and self.action < self.greedy_actions[state]):
+            self.max_q[state] = new_q
+            self.greedy_actions[state] = self.action
+        elif new_q < self.max_q[state] and self.action == self.greedy_actions[state]:
+            self.greedy_actions[state] = np.argmax(self.q_table[state])
+            self.max_q[state] = self.q_table[state, self.greedy_actions[state]]
+
     def get_egreedy_action(self, state):
         """
         Choose an action with e-greedy selection
         """
         rand_val = random.uniform(0, 1)
         if rand_val > self.epsilon:
-            return np.argmax(self.q_table[state])
+            return self.greedy_actions[state]
         else:
             return random.randint(0, self.n_actions-1)
 
@@ -67,10 +123,511 @@ class QLearner(Agent):
         """
         Only choose the action with the highest value estimate
         """
-        return np.argmax(self.q_table[state])
+        return self.greedy_actions[state]
+
+    def get_policy(self):
+        """
+        Return the greedy policy as an int8 action for every state
+        """
+        return self.greedy_actions.copy()
+
+    def rebuild_cache(self):
+        """
+        Recompute the max q-value and greedy action of every state (after the q-table is written directly)
+        """
+        self.greedy_actions[:] = np.argmax(self.q_table, axis=1)
+        self.max_q[:] = np.max(self.q_table, axis=1)
 
     def reset_learner(self):
         """
         Clear data in the q-table
         """
-        self.q_table = np.zeros((self.n_states, self.n_actions))
+        self.q_table.fill(0)
+        self.max_q.fill(0)
+        self.greedy_actions.fill(0)
+
+
+class TeamQLearner:
+    def __init__(self, n_agents, n_states, n_actions=5, dtype=np.float64):
+        self.n_agents = n_agents
+        self.n_states = n_states
+        self.n_actions = n_actions
+        self.discount = 0.9  # Discount factor (gamma)
+        self.alpha = 0.1  # Learning rate
+        self.epsilon = 0.15  # e-greedy
+        self.q_tables = np.zeros((n_agents, n_states, n_actions), dtype=dtype)  # One contiguous table for the team
+        self.max_q = np.zeros((n_agents, n_states), dtype=dtype)  # Max q-value of each state
+        self.greedy_actions = np.zeros((n_agents, n_states), dtype=np.int8)  # Greedy action of each state
+        self.agent_ids = np.arange(n_agents)
+        self.current_states = np.zeros(n_agents, dtype=int)
+        self.prev_states = np.zeros(n_agents, dtype=int)
+        self.actions = np.zeros(n_agents, dtype=int)
+
+    def set_current_states(self, states):
+        """
+        Set the current state of every agent after resetting for new epoch
+        """
+        self.prev_states = np.zeros(self.n_agents, dtype=int)
+        self.current_states = np.asarray(states)
+
+    def update_states(self, new_states):
+        """
+        Updates the current and previous states of every agent after taking an action
+        """
+        self.prev_states = self.current_states
+        self.current_states = np.asarray(new_states)
+
+    def update_q_vals(self, rewards):
+        """
+        Update the q-values of every agent after a state transition (rewards can be a scalar or one per agent)
+        """
+        q_vals = self.q_tables[self.agent_ids, self.prev_states, self.actions]
+        max_q = self.max_q[self.agent_ids, self.current_states]
+
+        new_q = ((1-self.alpha)*q_vals) + self.alpha*(rewards + (self.discount*max_q) - q_vals)
+        self.q_tables[self.agent_ids, self.prev_states, self.actions] = new_q
+
+        rows = self.agent_ids*self.n_states + self.prev_states
+        update_cached_rows(self.q_tables.reshape(-1, self.n_actions), self.max_q.reshape(-1),
+                           self.greedy_actions.reshape(-1), rows, self.actions, new_q)
+
+    def get_egreedy_actions(self, states, explore_draws=None, random_actions=None):
+        """
+        Choose an action for every agent with e-greedy selection. Explore draws and random actions pre-drawn for this
+        step (see exploration.ExplorationStreams) are used if given, otherwise they are drawn from NumPy's global
+        random state
+        """
+        greedy_actions = self.get_greedy_actions(states)
+        if explore_draws is None:
+            explore_draws = np.random.uniform(0, 1, self.n_agents)
+            random_actions = np.random.randint(0, self.n_actions, self.n_agents)
+
+        return np.where(explore_draws <= self.epsilon, random_actions, greedy_actions)
+
+    def get_greedy_actions(self, states):
+        """
+        Only choose the action with the highest value estimate for every agent
+        """
+        return self.greedy_actions[self.agent_ids, states]
+
+    def get_agent_view(self, agent_id):
+        """
+        Return the Q-table of a single agent as a view into the team Q-table
+        """
+        return self.q_tables[agent_id]
+
+    def get_agent_cache(self, agent_id):
+        """
+        Return the max q-values and greedy actions of a single agent as views into the team caches
+        """
+        return self.max_q[agent_id], self.greedy_actions[agent_id]
+
+    def get_policies(self):
+        """
+        Return the greedy policy of every agent as an (n_agents, n_states) int8 action map
+        """
+        return self.greedy_actions.copy()
+
+    def get_dense_q_tables(self):
+        """
+        Return a copy of the q-tables of every agent as an (n_agents, n_states, n_actions) array
+        """
+        return self.q_tables.copy()
+
+    def rebuild_cache(self):
+        """
+        Recompute the max q-value and greedy action of every state (after the q-tables are written directly)
+        """
+        self.greedy_actions[:] = np.argmax(self.q_tables, axis=2)
+        self.max_q[:] = np.max(self.q_tables, axis=2)
+
+    def get_q_state(self):
+        """
+        Arrays needed to restore the q-tables of the team (saved with checkpoints)
+        """
+        return {"q_tables": self.q_tables}
+
+    def set_q_state(self, q_state):
+        """
+        Restore the q-tables of the team from the arrays returned by get_q_state
+        """
+        self.q_tables[:] = q_state["q_tables"]
+        self.rebuild_cache()
+
+    def memory_usage(self):
+        """
+        Bytes used by the q-tables and their caches
+        """
+        n_bytes = self.q_tables.nbytes + self.max_q.nbytes + self.greedy_actions.nbytes
+        return {"allocated_bytes": n_bytes, "reserved_bytes": n_bytes, "dense_bytes": n_bytes}
+
+    def reset_learner(self):
+        """
+        Clear data in the team q-table (in place so agent views remain valid)
+        """
+        self.q_tables.fill(0)
+        self.max_q.fill(0)
+        self.greedy_actions.fill(0)
+
+
+class PagedQTable:
+    def __init__(self, n_tables, n_states, n_actions=5, page_size=64, dtype=np.float64):
+        """
+        Sparse q-tables for n_tables agents. States are grouped into pages of page_size rows that are only allocated
+        when a row of the page is first written, rows that were never written read as zeros from a shared zero page
+        """
+        self.n_tables = n_tables
+        self.n_states = n_states
+        self.n_actions = n_actions
+        self.page_size = page_size
+        self.n_pages = -(-n_states // page_size)  # Pages per table
+        self.page_table = np.zeros((n_tables, self.n_pages), dtype=np.int32)  # Page of each block (0 = zero page)
+        self.q_pages = np.zeros((1, page_size, n_actions), dtype=dtype)
+        self.max_pages = np.zeros((1, page_size), dtype=dtype)  # Max q-value of each row
+        self.greedy_pages = np.zeros((1, page_size), dtype=np.int8)  # Greedy action of each row
+        self.n_allocated = 1  # Page 0 is the shared zero page and is never written
+
+    def reserve(self, n_pages):
+        """
+        Grow the page pool (at least doubling it) so it can hold n_pages pages
+        """
+        capacity = len(self.q_pages)
+        if n_pages <= capacity:
+            return
+
+        extra = max(n_pages, 2*capacity) - capacity
+        self.q_pages = np.concatenate([self.q_pages, np.zeros((extra,) + self.q_pages.shape[1:], self.q_pages.dtype)])
+        self.max_pages = np.concatenate([self.max_pages, np.zeros((extra, self.page_size), self.max_pages.dtype)])
+        self.greedy_pages = np.concatenate([self.greedy_pages, np.zeros((extra, self.page_size), np.int8)])
+
+    def get_rows(self, tables, states, allocate=False):
+        """
+        Row index into the flattened page pool of each (table, state). With allocate, pages of rows that are about to
+        be written are allocated first ((table, state) pairs must be unique)
+        """
+        states = np.asarray(states)
+        page_ids = states // self.page_size
+        pages = self.page_table[tables, page_ids]
+        if allocate and np.any(pages == 0):
+            missing = pages == 0
+            keys = np.unique((np.broadcast_to(tables, pages.shape)[missing] * self.n_pages) + page_ids[missing])
+            new_pages = np.arange(self.n_allocated, self.n_allocated + len(keys))
+            self.reserve(self.n_allocated + len(keys))
+            self.q_pages[new_pages] = 0  # Pages are reused after the tables are cleared
+            self.max_pages[new_pages] = 0
+            self.greedy_pages[new_pages] = 0
+            self.page_table.reshape(-1)[keys] = new_pages
+            self.n_allocated += len(keys)
+            pages = self.page_table[tables, page_ids]
+
+        return pages*self.page_size + states % self.page_size
+
+    def q_rows(self):
+        """
+        Flattened (rows, n_actions) view of the page pool
+        """
+        return self.q_pages.reshape(-1, self.n_actions)
+
+    def get_policies(self, tables=slice(None)):
+        """
+        Greedy action of every state of the given tables as an int8 action map
+        """
+        page_table = self.page_table[tables]
+        policies = self.greedy_pages[page_table].reshape(len(page_table), -1)
+
+        return policies[:, :self.n_states]
+
+    def to_dense(self, tables=slice(None)):
+        """
+        Expand the given tables to a dense (n_tables, n_states, n_actions) array (rows never written are zero)
+        """
+        page_table = self.page_table[tables]
+        q_tables = self.q_pages[page_table].reshape(len(page_table), -1, self.n_actions)
+
+        return q_tables[:, :self.n_states]
+
+    def rebuild_cache(self):
+        """
+        Recompute the max q-value and greedy action of every allocated row
+        """
+        self.greedy_pages[1:] = np.argmax(self.q_pages[1:], axis=2)
+        self.max_pages[1:] = np.max(self.q_pages[1:], axis=2)
+
+    def clear(self, tables=slice(None)):
+        """
+        Clear the given tables (pages are only returned to the pool when every table is cleared)
+        """
+        self.page_table[tables] = 0
+        if not np.any(self.page_table):
+            self.n_allocated = 1
+
+    def get_q_state(self):
+        """
+        Page table and allocated pages (the compact form saved with checkpoints)
+        """
+        return {"page_table": self.page_table, "q_pages": self.q_pages[:self.n_allocated]}
+
+    def set_q_state(self, q_state):
+        """
+        Restore the tables from the arrays returned by get_q_state
+        """
+        self.page_table[:] = q_state["page_table"]
+        self.n_allocated = len(q_state["q_pages"])
+        self.reserve(self.n_allocated)
+        self.q_pages[:self.n_allocated] = q_state["q_pages"]
+        self.rebuild_cache()
+
+    def memory_usage(self):
+        """
+        Bytes used by allocated pages (plus the page table), bytes reserved by the page pool, and the bytes the same
+        tables would use as dense arrays
+        """
+        page_bytes = self.q_pages[0].nbytes + self.max_pages[0].nbytes + self.greedy_pages[0].nbytes
+        dense_bytes = self.n_tables*self.n_states*(page_bytes // self.page_size)
+        return {"allocated_pages": self.n_allocated - 1,
+                "allocated_bytes": self.page_table.nbytes + self.n_allocated*page_bytes,
+                "reserved_bytes": self.page_table.nbytes + len(self.q_pages)*page_bytes,
+                "dense_bytes": dense_bytes}
+
+
+class SparseQLearner(QLearner):
+    def __init__(self, n_states, x, y, q_store=None, table_id=0, page_size=64):
+        Agent.__init__(self, x, y)
+        self.n_states = n_states
+        self.n_actions = len(self.actions)
+        self.discount = 0.9  # Discount factor (gamma)
+        self.alpha = 0.1  # Learning rate
+        self.epsilon = 0.15  # e-greedy
+        if q_store is None:
+            self.q_table = PagedQTable(1, n_states, self.n_actions, page_size)
+        else:
+            self.q_table = q_store  # Paged tables shared with a SparseTeamQLearner
+        self.table_id = np.array([table_id])
+        self.current_state = None
+        self.prev_state = None
+        self.action = None
+
+    def update_q_val(self, reward):
+        """
+        Update q-values after a state transition
+        """
+        store = self.q_table
+        rows = store.get_rows(self.table_id, [self.prev_state], allocate=True)
+        q_val = store.q_rows()[rows, self.action]
+        max_q = store.max_pages.reshape(-1)[store.get_rows(self.table_id, [self.current_state])]
+
+        new_q = ((1-self.alpha)*q_val) + self.alpha*(reward + (self.discount*max_q) - q_val)
+        store.q_rows()[rows, self.action] = new_q
+        update_cached_rows(store.q_rows(), store.max_pages.reshape(-1), store.greedy_pages.reshape(-1), rows,
+                           np.array([self.action]), new_q)
+
+    def get_egreedy_action(self, state):
+        """
+        Choose an action with e-greedy selection
+        """
+        rand_val = random.uniform(0, 1)
+        if rand_val > self.epsilon:
+            return self.get_greedy_action(state)
+        else:
+            return random.randint(0, self.n_actions-1)
+
+    def get_greedy_action(self, state):
+        """
+        Only choose the action with the highest value estimate
+        """
+        return self.q_table.greedy_pages.reshape(-1)[self.q_table.get_rows(self.table_id, [state])][0]
+
+    def get_policy(self):
+        """
+        Return the greedy policy as an int8 action for every state
+        """
+        return self.q_table.get_policies(self.table_id)[0].copy()
+
+    def rebuild_cache(self):
+        """
+        Recompute the max q-value and greedy action of every allocated state
+        """
+        self.q_table.rebuild_cache()
+
+    def reset_learner(self):
+        """
+        Clear data in the q-table
+        """
+        self.q_table.clear(self.table_id)
+
+    def memory_usage(self):
+        """
+        Bytes used by the paged q-table
+        """
+        return self.q_table.memory_usage()
+
+
+class SparseTeamQLearner(TeamQLearner):
+    def __init__(self, n_agents, n_states, n_actions=5, dtype=np.float64, page_size=64):
+        self.n_agents = n_agents
+        self.n_states = n_states
+        self.n_actions = n_actions
+        self.discount = 0.9  # Discount factor (gamma)
+        self.alpha = 0.1  # Learning rate
+        self.epsilon = 0.15  # e-greedy
+        self.q_tables = PagedQTable(n_agents, n_states, n_actions, page_size, dtype)  # Rows allocated on first write
+        self.agent_ids = np.arange(n_agents)
+        self.current_states = np.zeros(n_agents, dtype=int)
+        self.prev_states = np.zeros(n_agents, dtype=int)
+        self.actions = np.zeros(n_agents, dtype=int)
+
+    def update_q_vals(self, rewards):
+        """
+        Update the q-values of every agent after a state transition (rewards can be a scalar or one per agent)
+        """
+        store = self.q_tables
+        rows = store.get_rows(self.agent_ids, self.prev_states, allocate=True)
+        q_vals = store.q_rows()[rows, self.actions]
+        max_q = store.max_pages.reshape(-1)[store.get_rows(self.agent_ids, self.current_states)]
+
+        new_q = ((1-self.alpha)*q_vals) + self.alpha*(rewards + (self.discount*max_q) - q_vals)
+        store.q_rows()[rows, self.actions] = new_q
+        update_cached_rows(store.q_rows(), store.max_pages.reshape(-1), store.greedy_pages.reshape(-1), rows,
+                           self.actions, new_q)
+
+    def get_greedy_actions(self, states):
+        """
+        Only choose the action with the highest value estimate for every agent
+        """
+        return self.q_tables.greedy_pages.reshape(-1)[self.q_tables.get_rows(self.agent_ids, states)]
+
+    def get_agent_view(self, agent_id):
+        """
+        Return the paged tables and the table id of a single agent (agents share the paged tables of the team)
+        """
+        return self.q_tables, agent_id
+
+    def get_policies(self):
+        """
+        Return the greedy policy of every agent as an (n_agents, n_states) int8 action map
+        """
+        return self.q_tables.get_policies().copy()
+
+    def get_dense_q_tables(self):
+        """
+        Return the q-tables of every agent expanded to an (n_agents, n_states, n_actions) array
+        """
+        return self.q_tables.to_dense()
+
+    def rebuild_cache(self):
+        """
+        Recompute the max q-value and greedy action of every allocated state
+        """
+        self.q_tables.rebuild_cache()
+
+    def get_q_state(self):
+        """
+        Arrays needed to restore the q-tables of the team (saved with checkpoints)
+        """
+        return self.q_tables.get_q_state()
+
+    def set_q_state(self, q_state):
+        """
+        Restore the q-tables of the team from the arrays returned by get_q_state
+        """
+        self.q_tables.set_q_state(q_state)
+
+    def reset_learner(self):
+        """
+        Clear data in the team q-tables, releasing all allocated pages
+        """
+        self.q_tables.clear()
+
+    def memory_usage(self):
+        """
+        Bytes used by the allocated pages of the team q-tables
+        """
+        return self.q_tables.memory_usage()
+
+
+class BatchQLearner:
+    def __init__(self, n_batch, n_agents, n_states, n_actions=5, dtype=np.float64):
+        self.n_batch = n_batch
+        self.n_agents = n_agents
+        self.n_states = n_states
+        self.n_actions = n_actions
+        self.discount = np.full((n_batch, 1), 0.9)  # Discount factor (gamma) of each batch
+        self.alpha = np.full((n_batch, 1), 0.1)  # Learning rate of each batch
+        self.epsilon = np.full((n_batch, 1), 0.15)  # e-greedy of each batch
+        self.q_tables = np.zeros((n_batch, n_agents, n_states, n_actions), dtype=dtype)
+        self.max_q = np.zeros((n_batch, n_agents, n_states), dtype=dtype)  # Max q-value of each state
+        self.greedy_actions = np.zeros((n_batch, n_agents, n_states), dtype=np.int8)  # Greedy action of each state
+        self.batch_ids = np.arange(n_batch)[:, None]
+        self.agent_ids = np.arange(n_agents)[None, :]
+        self.current_states = np.zeros((n_batch, n_agents), dtype=int)
+        self.prev_states = np.zeros((n_batch, n_agents), dtype=int)
+        self.actions = np.zeros((n_batch, n_agents), dtype=int)
+
+    def set_hyperparameters(self, alphas, epsilons, discounts):
+        """
+        Set the learning rate, e-greedy and discount factor of each batch
+        """
+        self.alpha = np.asarray(alphas, dtype=float).reshape(self.n_batch, 1)
+        self.epsilon = np.asarray(epsilons, dtype=float).reshape(self.n_batch, 1)
+        self.discount = np.asarray(discounts, dtype=float).reshape(self.n_batch, 1)
+
+    def set_current_states(self, states):
+        """
+        Set the current state of every agent in every batch after resetting for new epoch
+        """
+        self.prev_states = np.zeros((self.n_batch, self.n_agents), dtype=int)
+        self.current_states = np.asarray(states)
+
+    def update_states(self, new_states):
+        """
+        Updates the current and previous states of every agent in every batch after taking an action
+        """
+        self.prev_states = self.current_states
+        self.current_states = np.asarray(new_states)
+
+    def update_q_vals(self, rewards):
+        """
+        Update the q-values of every agent in every batch after a state transition
+        """
+        q_vals = self.q_tables[self.batch_ids, self.agent_ids, self.prev_states, self.actions]
+        max_q = self.max_q[self.batch_ids, self.agent_ids, self.current_states]
+
+        new_q = ((1-self.alpha)*q_vals) + self.alpha*(rewards + (self.discount*max_q) - q_vals)
+        self.q_tables[self.batch_ids, self.agent_ids, self.prev_states, self.actions] = new_q
+
+        rows = ((self.batch_ids*self.n_agents + self.agent_ids)*self.n_states + self.prev_states).reshape(-1)
+        update_cached_rows(self.q_tables.reshape(-1, self.n_actions), self.max_q.reshape(-1),
+                           self.greedy_actions.reshape(-1), rows, self.actions.reshape(-1), new_q.reshape(-1))
+
+    def get_egreedy_actions(self, states, explore_draws=None, random_actions=None):
+        """
+        Choose an action for every agent in every batch with e-greedy selection. Explore draws and random actions
+        pre-drawn for this step, (n_batch, n_agents) each, are used if given, otherwise they are drawn from NumPy's
+        global random state
+        """
+        greedy_actions = self.get_greedy_actions(states)
+        if explore_draws is None:
+            explore_draws = np.random.uniform(0, 1, (self.n_batch, self.n_agents))
+            random_actions = np.random.randint(0, self.n_actions, (self.n_batch, self.n_agents))
+
+        return np.where(explore_draws <= self.epsilon, random_actions, greedy_actions)
+
+    def get_greedy_actions(self, states):
+        """
+        Only choose the action with the highest value estimate for every agent in every batch
+        """
+        return self.greedy_actions[self.batch_ids, self.agent_ids, states]
+
+    def get_policies(self):
+        """
+        Return the greedy policy of every agent in every batch as an (n_batch, n_agents, n_states) int8 action map
+        """
+        return self.greedy_actions.copy()
+
+    def reset_learner(self):
+        """
+        Clear data in the q-tables of every batch
+        """
+        self.q_tables.fill(0)
+        self.max_q.fill(0)
+        self.greedy_actions.fill(0)
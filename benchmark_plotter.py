@@ -0,0 +1,47 @@
+import matplotlib.pyplot as plt
+import json
+import os
+import sys
+
+
+def create_benchmark_plot(results_file, x_axis="n_agents", metric="train_time", size=None):
+    """
+    Plot how the macro benchmark metric of every method scales with x_axis (n_agents, n_targets or size). Each line
+    holds the other parameters fixed, size picks a single grid size
+    """
+    with open(results_file) as json_file:
+        results = json.load(json_file)["results"]
+
+    # Group the benchmarks that were not skipped into lines
+    lines = {}
+    for key, result in results.items():
+        if not key.startswith("macro/") or "skipped" in result or (size is not None and result["size"] != size):
+            continue
+        fixed = {param: result[param] for param in ["size", "n_agents", "n_targets"] if param != x_axis}
+        label = f'{result["method"]} ' + ', '.join(f'{param}={val}' for param, val in fixed.items())
+        lines.setdefault(label, []).append((result[x_axis], result[metric]))
+
+    for label, points in sorted(lines.items()):
+        points.sort()
+        plt.plot([x for x, y in points], [y for x, y in points], marker='o', label=label)
+
+    # Graph Details
+    plt.xscale("log")
+    plt.yscale("log")
+    plt.xlabel(x_axis)
+    plt.ylabel(metric)
+    plt.legend(fontsize='small')
+
+    # Save the plot
+    if not os.path.exists('Plots'):  # If Data directory does not exist, create it
+        os.makedirs('Plots')
+    plt.savefig(f'Plots/Benchmark_{metric}_vs_{x_axis}.pdf')
+
+    # Show the plot
+    plt.show()
+
+
+if __name__ == "__main__":
+    results_file = sys.argv[1] if len(sys.argv) > 1 else "Benchmarks/Results.json"
+    x_axis = sys.argv[2] if len(sys.argv) > 2 else "n_agents"
+    create_benchmark_plot(results_file, x_axis)
@@ -0,0 +1,346 @@
+from gridworld import GridWorld
+from world_generator import generate_world
+from difference_reward import calc_difference_reward
+from cfl import calc_cfl_difference, create_counterfactuals
+from pbrs import PBRS, create_team_potentials
+from run_gridworld import train_stat_run
+from run_sweep import sweep_methods
+from episode_kernel import select_backend
+from exploration import ExplorationStreams
+import numpy as np
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Peak RSS is only available on Unix, it is recorded as None elsewhere
+    resource = None
+
+
+# Reward type each trainer in run_gridworld trains with (potentials and counterfactuals are given by sweep_methods)
+method_rewards = {"q_learning": "local", "global": "global", "difference": "difference", "pbrs": "global",
+                  "cfl": "cfl", "drip": "difference", "cflp": "cfl"}
+pbrs_ptypes = ["exploration", "target_prox", "target_agent", "custom"]
+compared_metrics = ["best", "train_time", "peak_rss", "peak_traced"]  # Lower is better for every compared metric
+
+
+def get_peak_rss():
+    """
+    Peak resident set size of this process in bytes (None if it cannot be measured on this platform)
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return max_rss if sys.platform == 'darwin' else max_rss*1024  # Linux reports kilobytes, macOS bytes
+
+
+def get_result_key(kind, name, size, n_agents, n_targets):
+    """
+    Key a result is stored under (and matched with the baseline by)
+    """
+    return f'{kind}/{name}/{size}x{size}/{n_agents}Agents/{n_targets}Targets'
+
+
+def expand_configs(config):
+    """
+    Expand the swept sizes, team sizes and target counts of a benchmark configuration. A target count of None uses
+    one target per agent
+    """
+    configs = []
+    for size, n_agents, n_targets in itertools.product(config["size"], config["n_agents"], config["n_targets"]):
+        configs.append((size, n_agents, n_agents if n_targets is None else n_targets))
+
+    return configs
+
+
+def create_bench_world(size, n_agents, n_targets, seed=0, max_bytes=2**31):
+    """
+    Create a size x size world with targets and agents placed at random. Teams whose dense Q-Tables would be larger
+    than max_bytes use sparse Q-Tables
+    """
+    sparse_q = n_agents*size*size*5*np.dtype(np.float64).itemsize > max_bytes
+    gw = GridWorld(size, size, sparse_q=sparse_q)
+    gw.targets, agent_locs = generate_world(size, size, n_agents, n_targets, seed)
+    with contextlib.redirect_stdout(io.StringIO()):  # Target values are printed when they are assigned
+        gw.assign_target_values(n_targets)
+    gw.create_agents(agent_locs)
+
+    return gw
+
+
+def time_call(func, repeat=5):
+    """
+    Time a function without arguments the way timeit does: the number of calls per repeat is chosen so a repeat
+    takes at least 0.2 seconds. Returns the best and median seconds per call
+    """
+    timer = timeit.Timer(func)
+    number, total_time = timer.autorange()
+    times = np.array(timer.repeat(repeat, number))/number
+
+    return {"best": float(times.min()), "median": float(np.median(times)), "number": number, "repeat": repeat}
+
+
+def get_micro_benchmarks(gw, n_steps, seed=0):
+    """
+    Functions timed by the micro-benchmarks for a world. Agents are moved to random states first (half of them on top
+    of targets) so rewards are calculated for a realistic occupancy
+    """
+    rng = np.random.default_rng(seed)
+    team = gw.team_learner
+    target_states = np.flatnonzero(gw.state_targets >= 0)
+    states = rng.integers(0, gw.n_states, team.n_agents)
+    n_on_target = min(team.n_agents//2, len(target_states))
+    states[:n_on_target] = rng.choice(target_states, n_on_target, replace=False)
+    actions = rng.integers(0, team.n_actions, team.n_agents)
+    gw.reset_agents()
+    gw.move_team_states(states)
+    g_reward = gw.calculate_g_reward()
+    counterfactuals = create_counterfactuals(gw, "distance", team.n_agents)
+
+    # Single agent Q-Learner part way through a transition
+    agent = gw.agents['A0']
+    agent.set_current_state(int(states[0]))
+    agent.action = int(actions[0])
+    agent.update_state(int(gw.next_state[states[0], actions[0]]))
+
+    team.set_current_states(states.copy())
+    team.actions = actions
+    team.update_states(gw.next_state[states, actions])
+    rewards = rng.uniform(0, 1, team.n_agents)
+    exploration = ExplorationStreams(seed, team.n_agents, n_steps, team.n_actions)
+    explore_draws, random_actions = exploration.draw_epoch()
+    position = gw.state_coords[states[0]].tolist()
+    learner_name = type(agent).__name__
+    team_name = type(team).__name__
+
+    benchmarks = {
+        "GridWorld.step": lambda: gw.step(position, 3),
+        "GridWorld.step_states": lambda: gw.step_states(states, actions),
+        "GridWorld.calculate_g_reward": gw.calculate_g_reward,
+        "calc_difference_reward": lambda: calc_difference_reward(g_reward, gw),
+        "calc_cfl_difference": lambda: calc_cfl_difference(g_reward, gw, counterfactuals),
+        f"{learner_name}.update_q_val": lambda: agent.update_q_val(1.0),
+        f"{learner_name}.get_egreedy_action": lambda: agent.get_egreedy_action(agent.current_state),
+        f"{team_name}.update_q_vals": lambda: team.update_q_vals(rewards),
+        f"{team_name}.get_egreedy_actions": lambda: team.get_egreedy_actions(team.current_states, explore_draws[0],
+                                                                             random_actions[0]),
+        "ExplorationStreams.draw_epoch": exploration.draw_epoch
+    }
+    for ptype in pbrs_ptypes:
+        benchmarks[f"PBRS.set_potentials[{ptype}]"] = \
+            lambda ptype=ptype: PBRS(gw.n_states).set_potentials(gw, 0, n_steps, ptype)
+
+    return benchmarks
+
+
+def run_micro_benchmarks(config, seed=0, max_bytes=2**31):
+    """
+    Time every micro-benchmark for each world in the configuration. Worlds that cannot be created are recorded as
+    skipped
+    """
+    results = {}
+    for size, n_agents, n_targets in expand_configs(config):
+        params = {"size": size, "n_agents": n_agents, "n_targets": n_targets}
+        try:
+            gw = create_bench_world(size, n_agents, n_targets, seed, max_bytes)
+        except ValueError as err:
+            print(f'Skipping micro-benchmarks: {size}x{size}, {n_agents} agents, {n_targets} targets ({err})')
+            results[get_result_key("micro", "world", size, n_agents, n_targets)] = dict(params, skipped=str(err))
+            continue
+
+        random.seed(seed)
+        np.random.seed(seed)
+        for name, func in get_micro_benchmarks(gw, config["n_steps"], seed).items():
+            timing = time_call(func, config["repeat"])
+            results[get_result_key("micro", name, size, n_agents, n_targets)] = dict(params, name=name, **timing)
+            print(f'{name} ({size}x{size}, {n_agents} agents, {n_targets} targets): {timing["best"]*1e6:.2f} us')
+
+    return results
+
+
+def macro_benchmark(method, size, n_agents, n_targets, n_epochs, n_steps, backend, seed, max_bytes, trace_memory):
+    """
+    Train a single stat run of a method from scratch and record its wall time and peak memory. Runs in a fresh
+    process (see run_macro_benchmarks), so the peak RSS belongs to this benchmark alone. With trace_memory, the peak
+    memory allocated through Python (including NumPy arrays) is traced as well, which slows training down
+    """
+    if trace_memory:
+        tracemalloc.start()
+
+    start_time = time.perf_counter()
+    gw = create_bench_world(size, n_agents, n_targets, seed, max_bytes)
+    counterfactuals = None
+    team_potentials = None
+    if sweep_methods[method]["ctype"]:
+        counterfactuals = create_counterfactuals(gw, "distance", n_agents)
+    if sweep_methods[method]["ptype"]:
+        team_potentials = create_team_potentials(gw, n_agents, n_steps, "target_prox")
+    setup_time = time.perf_counter() - start_time
+
+    random.seed(seed)
+    np.random.seed(seed)
+    start_time = time.perf_counter()
+    g_curve, l_curve, best_solution, evaluated = train_stat_run(gw, n_epochs, n_steps, method_rewards[method],
+                                                                counterfactuals, team_potentials, backend, seed=seed)
+    train_time = time.perf_counter() - start_time
+
+    peak_traced = None
+    if trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"setup_time": setup_time, "train_time": train_time, "epochs_per_sec": n_epochs/train_time,
+            "steps_per_sec": n_epochs*n_steps/train_time, "peak_rss": get_peak_rss(), "peak_traced": peak_traced,
+            "sparse_q": gw.sparse_q, "final_g_reward": float(g_curve[-1])}
+
+
+def run_macro_benchmarks(config, seed=0, max_bytes=2**31):
+    """
+    Train every method for a fixed number of epochs on each world in the configuration. Every benchmark runs in its
+    own spawned process. Methods with team potentials larger than max_bytes are skipped
+    """
+    results = {}
+    backend = select_backend(config["backend"])
+    mp_context = multiprocessing.get_context("spawn")  # A forked process would start with the RSS of this one
+    for (size, n_agents, n_targets), method in itertools.product(expand_configs(config), config["method"]):
+        key = get_result_key("macro", method, size, n_agents, n_targets)
+        params = {"method": method, "size": size, "n_agents": n_agents, "n_targets": n_targets,
+                  "n_epochs": config["n_epochs"], "n_steps": config["n_steps"], "backend": backend}
+        if sweep_methods[method]["ptype"] and n_agents*size*size*np.dtype(np.float64).itemsize > max_bytes:
+            results[key] = dict(params, skipped="team potentials do not fit in max_bytes")
+            print(f'Skipping {method} ({size}x{size}, {n_agents} agents, {n_targets} targets): '
+                  f'{results[key]["skipped"]}')
+            continue
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp_context) as pool:
+            future = pool.submit(macro_benchmark, method, size, n_agents, n_targets, config["n_epochs"],
+                                 config["n_steps"], backend, seed, max_bytes, config["trace_memory"])
+            try:
+                results[key] = dict(params, **future.result())
+            except Exception as err:
+                # A world that cannot be created (or a run that fails) does not stop the rest of the benchmarks
+                results[key] = dict(params, skipped=repr(err))
+                print(f'Skipping {method} ({size}x{size}, {n_agents} agents, {n_targets} targets): {err!r}')
+                continue
+        print(f'{method} ({size}x{size}, {n_agents} agents, {n_targets} targets): '
+              f'{results[key]["train_time"]:.2f} s, {results[key]["steps_per_sec"]:.0f} steps/s')
+
+    return results
+
+
+def get_machine_info():
+    """
+    Describe the machine and library versions the benchmarks ran with (timings are only comparable on the same one)
+    """
+    return {"time": datetime.datetime.now().isoformat(timespec='seconds'), "python": platform.python_version(),
+            "numpy": np.__version__, "platform": platform.platform(), "processor": platform.processor(),
+            "cpu_count": os.cpu_count()}
+
+
+def save_results(results, file_name):
+    """
+    Write benchmark results to a JSON file atomically
+    """
+    if os.path.dirname(file_name) and not os.path.exists(os.path.dirname(file_name)):
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    with open(file_name + '.tmp', 'w') as json_file:
+        json.dump(results, json_file, indent=2)
+    os.replace(file_name + '.tmp', file_name)
+
+
+def compare_results(results, baseline, threshold):
+    """
+    Compare every metric measured in both the results and the baseline. A metric regresses when it is more than
+    threshold (a fraction) above the baseline. Returns a list of (key, metric, baseline value, new value) regressions
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric in compared_metrics:
+            new_val = result.get(metric)
+            base_val = baseline[key].get(metric)
+            if new_val is None or base_val is None or base_val <= 0:
+                continue
+            ratio = new_val/base_val
+            if ratio > 1 + threshold:
+                regressions.append((key, metric, base_val, new_val))
+                print(f'REGRESSION {key} {metric}: {base_val:.4g} -> {new_val:.4g} ({ratio:.2f}x)')
+            elif ratio < 1/(1 + threshold):
+                print(f'Improvement {key} {metric}: {base_val:.4g} -> {new_val:.4g} ({ratio:.2f}x)')
+
+    return regressions
+
+
+def run_benchmarks(benchmark):
+    """
+    Run the micro and macro benchmarks, save the results, and compare them with the baseline. If there is no baseline
+    yet the results become the baseline. Returns the list of regressions
+    """
+    results = {}
+    if benchmark.get("micro"):
+        results.update(run_micro_benchmarks(benchmark["micro"], benchmark["seed"], benchmark["max_bytes"]))
+    if benchmark.get("macro"):
+        results.update(run_macro_benchmarks(benchmark["macro"], benchmark["seed"], benchmark["max_bytes"]))
+    save_results({"info": get_machine_info(), "benchmark": benchmark, "results": results}, benchmark["results_file"])
+
+    baseline_file = benchmark["baseline_file"]
+    if not os.path.exists(baseline_file):
+        print(f'No baseline found, saving these results as the baseline: {baseline_file}')
+        save_results({"info": get_machine_info(), "benchmark": benchmark, "results": results}, baseline_file)
+        return []
+
+    with open(baseline_file) as json_file:
+        baseline = json.load(json_file)
+    regressions = compare_results(results, baseline["results"], benchmark["threshold"])
+    print(f'{len(regressions)} regressions above the {benchmark["threshold"]:.0%} threshold (baseline from '
+          f'{baseline["info"]["time"]})')
+
+    return regressions
+
+
+if __name__ == "__main__":
+    benchmark = {
+        "micro": {
+            "size": [10, 100, 1000],
+            "n_agents": [5, 100, 1000],
+            "n_targets": [None],  # None places one target per agent
+            "n_steps": 30,  # Used by the PBRS potentials
+            "repeat": 5
+        },
+        "macro": {
+            "method": ["q_learning", "global", "difference", "pbrs", "cfl", "drip", "cflp"],
+            "size": [10, 100, 1000],
+            "n_agents": [5, 50, 1000],
+            "n_targets": [None],
+            "n_epochs": 20,
+            "n_steps": 30,
+            "backend": "numpy",  # numpy or jit
+            "trace_memory": False  # Trace peak Python/NumPy allocations (slows training down)
+        },
+        "seed": 0,
+        "max_bytes": 2**31,  # Larger Q-Tables are sparse, methods with larger team potentials are skipped
+        "threshold": 0.25,  # Fractional slowdown (or memory growth) reported as a regression
+        "results_file": "Benchmarks/Results.json",
+        "baseline_file": "Benchmarks/Baseline.json"
+    }
+
+    if len(sys.argv) > 1:  # Optionally load the benchmark configuration from a JSON file
+        with open(sys.argv[1]) as json_file:
+            benchmark = json.load(json_file)
+
+    if run_benchmarks(benchmark):
+        sys.exit(1)
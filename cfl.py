@@ -1,19 +1,20 @@
 import numpy as np
 
 
+def agent_target_distances(gw):
+    """
+    Calculate the distance between each agent's initial position and each target as an (n_agents, n_targets) array
+    """
+    agent_locs = np.array([gw.agents[ag].initial_position for ag in gw.agents], dtype=int).reshape(-1, 2)
+    target_locs = np.asarray(gw.targets, dtype=int).reshape(-1, 2)
+    return np.abs(agent_locs[:, None, :] - target_locs[None, :, :]).sum(axis=2)
+
+
 def distance_based(gw):
     """
     Create counterfactuals that agents will use for CFL learning
     """
-    counterfactuals = [[0 for i in range(len(gw.targets))] for j in range(len(gw.agents))]
-    for a_id, ag in enumerate(gw.agents):
-        for t_id, t_loc in enumerate(gw.targets):
-            x_dist = abs(gw.agents[ag].initial_position[0] - t_loc[0])
-            y_dist = abs(gw.agents[ag].initial_position[1] - t_loc[1])
-            total_dist = x_dist + y_dist
-
-            if total_dist > (gw.width - 3):
-                counterfactuals[a_id][t_id] = 1
+    counterfactuals = agent_target_distances(gw) > (gw.width - 3)
 
     return counterfactuals
 
@@ -22,11 +23,8 @@ def value_based(gw):
     """
     Counterfactual states reflect target values
     """
-    counterfactuals = [[0 for i in range(len(gw.targets))] for j in range(len(gw.agents))]
-    for a_id in range(len(gw.agents)):
-        for t_id in range(len(gw.targets)):
-            if gw.target_values[t_id] > 1:
-                counterfactuals[a_id][t_id] = 1
+    high_value = np.asarray(gw.target_values) > 1
+    counterfactuals = np.tile(high_value, (len(gw.agents), 1))
 
     return counterfactuals
 
@@ -35,18 +33,11 @@ def agent_dist_split(gw, n_agents):
     """
     Create counterfactuals that divide agents evenly between capturing far away targets and close targets
     """
-    counterfactuals = [[0 for i in range(len(gw.targets))] for j in range(len(gw.agents))]
-    for a_id, ag in enumerate(gw.agents):
-        for t_id, t_loc in enumerate(gw.targets):
-            x_dist = abs(gw.agents[ag].initial_position[0] - t_loc[0])
-            y_dist = abs(gw.agents[ag].initial_position[1] - t_loc[1])
-            total_dist = x_dist + y_dist
-            if total_dist <= (gw.width - 3) and a_id < n_agents:
-                counterfactuals[a_id][t_id] = 1
-            elif total_dist > (gw.width - 3) and a_id >= n_agents:
-                counterfactuals[a_id][t_id] = 1
-
-        assert(1 in counterfactuals[a_id])
+    total_dist = agent_target_distances(gw)
+    close_agents = (np.arange(len(gw.agents)) < n_agents)[:, None]
+    counterfactuals = np.where(close_agents, total_dist <= (gw.width - 3), total_dist > (gw.width - 3))
+
+    assert(counterfactuals.any(axis=1).all())
     return counterfactuals
 
 
@@ -54,18 +45,14 @@ def poi_assignments(gw):
     """
     Assign each agent to a unique POI
     """
-    counterfactuals = [[0 for i in range(len(gw.targets))] for j in range(len(gw.agents))]
-    for a_id, ag in enumerate(gw.agents):
-        for t_id, t_loc in enumerate(gw.targets):
-            if a_id == t_id:
-                counterfactuals[a_id][t_id] = 1
+    counterfactuals = np.eye(len(gw.agents), len(gw.targets), dtype=bool)
 
     return counterfactuals
 
 
 def create_counterfactuals(gw, ctype, n_agents):
     """
-    Generate counterfactual states for agents
+    Generate counterfactual states for agents as an (n_agents, n_targets) boolean array
     """
     if ctype == "distance":
         counterfactuals = distance_based(gw)
@@ -85,25 +72,39 @@ def calc_cfl_difference(g_reward, gw, counterfactuals):
     """
     Calculate the difference reward for each agent using CFL counterfactuals
     """
-    difference_reward = np.zeros(len(gw.agents))
-
-    # Count number of agents at a target
-    for i in range(len(gw.agents)):
-        target_capture_counter = np.zeros(len(gw.targets))
-        for t_id, t_loc in enumerate(gw.targets):
-            for a_id, ag in enumerate(gw.agents):
-                if t_loc == gw.agents[ag].loc and a_id == i and counterfactuals[i][t_id] == 1:
-                    pass
-                elif t_loc == gw.agents[ag].loc:
-                    target_capture_counter[t_id] += 1
-
-        # Count how many targets are captured in counterfactual state
-        target_values = 0
-        for t_id, agent_count in enumerate(target_capture_counter):
-            if agent_count > 0:
-                target_values += gw.target_values[t_id]
-
-        counterfactual_global_reward = (target_values/np.sum(gw.target_values))*100
-        difference_reward[i] = g_reward - counterfactual_global_reward
+    counterfactuals = np.asarray(counterfactuals, dtype=bool)
+
+    # Agent i is only removed from its target if that target is part of agent i's counterfactual
+    agent_targets = gw.get_agent_targets()
+    at_target = np.flatnonzero(agent_targets >= 0)
+    removed = np.zeros(len(agent_targets), dtype=bool)
+    removed[at_target] = counterfactuals[at_target, agent_targets[at_target]]
+
+    # Removing agent i only changes the global reward when agent i is the only agent at its target
+    removed_ids = np.flatnonzero(removed)
+    removed[removed_ids] = gw.target_occupancy[agent_targets[removed_ids]] == 1
+    lost_value = np.zeros(len(agent_targets))
+    lost_value[removed] = gw.target_values[agent_targets[removed]]
+
+    counterfactual_global_reward = ((gw.captured_value - lost_value)/gw.total_value)*100
+    difference_reward = g_reward - counterfactual_global_reward
+
+    return difference_reward
+
+
+def calc_batch_cfl_difference(g_rewards, gw, counterfactuals, agent_targets, target_occupancy):
+    """
+    Calculate the difference reward for each agent in a batch of teams using CFL counterfactuals
+    """
+    counterfactuals = np.asarray(counterfactuals, dtype=bool)
+    at_target = agent_targets >= 0
+    safe_targets = np.where(at_target, agent_targets, 0)
+    removed = at_target & counterfactuals[np.arange(agent_targets.shape[1]), safe_targets]
+    removed &= np.take_along_axis(target_occupancy, safe_targets, axis=1) == 1
+    lost_value = np.where(removed, gw.target_values[safe_targets], 0.0)
+
+    captured_value = gw.calculate_captured_value(target_occupancy)[:, None]
+    counterfactual_global_reward = ((captured_value - lost_value)/gw.total_value)*100
+    difference_reward = np.asarray(g_rewards)[:, None] - counterfactual_global_reward
 
     return difference_reward
@@ -0,0 +1,79 @@
+import numpy as np
+import random
+import os
+
+
+def get_checkpoint_names(output_dir, file_name, stat_runs):
+    """
+    Checkpoint file of each stat run of a result
+    """
+    return [os.path.join(output_dir, 'Checkpoints', f'{file_name}_SR{sr}.npz') for sr in range(stat_runs)]
+
+
+def remove_checkpoints(checkpoint_names):
+    """
+    Remove checkpoints once they are no longer needed (or are left over from an earlier run)
+    """
+    for checkpoint_name in checkpoint_names:
+        if os.path.exists(checkpoint_name):
+            os.remove(checkpoint_name)
+
+
+def save_checkpoint(checkpoint_name, team, team_potentials, ep, g_learning_curve, l_learning_curve, best_solution,
+                    evaluated, rollout):
+    """
+    Save the training state of a stat run after epoch ep: Q-Tables, PBRS potentials, the states of both random number
+    generators, the partial learning curves and the last greedy rollout. The checkpoint is compressed (Q-Tables are
+    mostly zeros early in training) and written atomically
+    """
+    if not os.path.exists(os.path.dirname(checkpoint_name)):  # If checkpoint directory does not exist, create it
+        os.makedirs(os.path.dirname(checkpoint_name), exist_ok=True)
+
+    py_version, py_state, py_gauss = random.getstate()
+    np_name, np_keys, np_pos, np_has_gauss, np_gauss = np.random.get_state()
+    state = {
+        "epoch": ep, "g_learning_curve": g_learning_curve, "l_learning_curve": l_learning_curve,
+        "best_solution": np.array(best_solution, dtype=np.int8),
+        "evaluated": evaluated, "py_random_version": py_version, "py_random_state": np.array(py_state),
+        "py_random_gauss": np.nan if py_gauss is None else py_gauss, "np_random_keys": np_keys,
+        "np_random_pos": np_pos, "np_random_has_gauss": np_has_gauss, "np_random_gauss": np_gauss
+    }
+    state.update(team.get_q_state())  # Dense Q-Tables, or the page table and allocated pages of sparse Q-Tables
+    if team_potentials is not None:
+        state["team_potentials"] = team_potentials
+    if rollout is not None:
+        (state["rollout_g_reward"], state["rollout_l_rewards"], state["rollout_states"],
+         state["rollout_actions"]) = rollout
+
+    tmp_name = f'{checkpoint_name}.{os.getpid()}.tmp'
+    with open(tmp_name, 'wb') as npz_file:
+        np.savez_compressed(npz_file, **state)
+    os.replace(tmp_name, checkpoint_name)
+
+
+def load_checkpoint(checkpoint_name, team, team_potentials):
+    """
+    Restore the Q-Tables and random number generator states saved by save_checkpoint. Returns the epoch to continue
+    from, the partial learning curves, best solution, evaluation mask and last greedy rollout
+    """
+    with np.load(checkpoint_name) as state:
+        if (team_potentials is None) != ("team_potentials" not in state) or \
+                (team_potentials is not None and not np.array_equal(team_potentials, state["team_potentials"])):
+            raise ValueError(f'{checkpoint_name} was saved with different PBRS potentials')
+
+        team.set_q_state(state)
+
+        py_gauss = float(state["py_random_gauss"])
+        random.setstate((int(state["py_random_version"]), tuple(int(val) for val in state["py_random_state"]),
+                         None if np.isnan(py_gauss) else py_gauss))
+        np.random.set_state(('MT19937', state["np_random_keys"], int(state["np_random_pos"]),
+                             int(state["np_random_has_gauss"]), float(state["np_random_gauss"])))
+
+        rollout = None
+        if "rollout_states" in state:
+            rollout = (float(state["rollout_g_reward"]), state["rollout_l_rewards"], state["rollout_states"],
+                       state["rollout_actions"])
+        best_solution = [row.tolist() for row in state["best_solution"]]
+
+        return (int(state["epoch"]) + 1, state["g_learning_curve"], state["l_learning_curve"], best_solution,
+                state["evaluated"], rollout)
@@ -2,13 +2,13 @@ from gridworld import GridWorld
 from plot_gworld import create_plot_gridworld
 
 
-def create_gridworld(n_agents, n_targets, width, height, n_steps):
+def create_gridworld(n_agents, n_targets, width, height, n_steps, seed=None):
     """
-    Create Gridworld configuration files
+    Create Gridworld configuration files (the same seed always creates the same world)
     """
     gw = GridWorld(width, height)
-    # gw.create_world(n_agents, n_targets)  # Create a new world configuration
-    gw.create_center_world(n_agents, n_targets, n_steps)
+    # gw.create_world(n_agents, n_targets, seed=seed)  # Create a new world configuration
+    gw.create_center_world(n_agents, n_targets, n_steps, seed=seed)
 
 
 if __name__ == "__main__":
@@ -18,6 +18,7 @@ if __name__ == "__main__":
     n_targets = n_agents
     n_steps = 30
     min_dist_center = width - 1
+    seed = None  # Seed used to place targets (None for a new world every time)
 
-    create_gridworld(n_agents, n_targets, width, height, min_dist_center)
+    create_gridworld(n_agents, n_targets, width, height, min_dist_center, seed)
     create_plot_gridworld(n_agents, n_targets, width, height)
@@ -0,0 +1,94 @@
+from global_functions import import_curve_data, load_sidecar
+import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+summary_version = 1  # Increment when the way summaries are computed changes
+default_window = 100  # Number of final epochs averaged for the final-window statistics
+
+
+def get_source_signature(file_path):
+    """
+    Modification time and size of a result file and its JSON sidecar (if any), used to detect changed results
+    """
+    signature = []
+    for path_name in [file_path + '.npy', file_path + '.json', file_path]:
+        if os.path.exists(path_name):
+            stat = os.stat(path_name)
+            signature.extend([stat.st_mtime_ns, stat.st_size])
+
+    return signature
+
+
+def get_completed_curves(file_path):
+    """
+    Load a result with its stat runs on the first axis, keeping only completed stat runs when the result has a sidecar
+    """
+    curves = import_curve_data(file_path)
+    sidecar = load_sidecar(os.path.dirname(file_path), os.path.basename(file_path))
+    if sidecar is None:
+        return np.asarray(curves, dtype=np.float64)
+
+    curves = np.moveaxis(curves, sidecar["run_axis"], 0)
+    completed_runs = sorted(sidecar["completed_runs"])
+
+    return np.asarray(curves[completed_runs], dtype=np.float64)
+
+
+def create_curve_summary(file_path, window=default_window):
+    """
+    Statistics of a result over its stat runs: the mean learning curve and its standard error, the mean and standard
+    error of the final epoch, and the mean and standard error of the average over the final window epochs
+    """
+    curves = get_completed_curves(file_path)
+    n_runs = len(curves)
+    final_rewards = curves[..., -1]
+    window_rewards = np.mean(curves[..., -window:], axis=-1)
+    # Learning curves use the population standard deviation and final rewards the sample standard deviation (the
+    # conventions of the original plotters). A single stat run has no spread
+    ddof = 1 if n_runs > 1 else 0
+
+    return {
+        "mean": np.mean(curves, axis=0),
+        "stderr": np.std(curves, axis=0)/np.sqrt(n_runs),
+        "final_mean": np.mean(final_rewards, axis=0),
+        "final_err": np.std(final_rewards, axis=0, ddof=ddof)/np.sqrt(n_runs),
+        "window_mean": np.mean(window_rewards, axis=0),
+        "window_err": np.std(window_rewards, axis=0, ddof=ddof)/np.sqrt(n_runs),
+        "n_runs": n_runs
+    }
+
+
+def load_curve_summary(file_path, window=default_window):
+    """
+    Load the cached summary of a result, or create it (and save it next to the result) if the result has changed
+    since the summary was saved
+    """
+    summary_name = file_path + '_Summary.npz'
+    signature = np.array(get_source_signature(file_path) + [summary_version, window], dtype=np.int64)
+    if os.path.exists(summary_name):
+        with np.load(summary_name) as summary:
+            if np.array_equal(summary["signature"], signature):
+                return {key: summary[key] for key in summary.files if key != "signature"}
+
+    summary = create_curve_summary(file_path, window)
+
+    # Write to a temporary file first so other processes never see a partially written summary
+    tmp_name = f'{summary_name}.{os.getpid()}.tmp'
+    with open(tmp_name, 'wb') as npz_file:
+        np.savez(npz_file, signature=signature, **summary)
+    os.replace(tmp_name, summary_name)
+
+    return summary
+
+
+def load_curve_summaries(file_paths, window=default_window, workers=None):
+    """
+    Load the summaries of several results, reading and summarizing them on a pool of threads
+    """
+    if len(file_paths) < 2 or workers == 1:
+        return [load_curve_summary(file_path, window) for file_path in file_paths]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda file_path: load_curve_summary(file_path, window), file_paths))
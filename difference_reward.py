@@ -5,23 +5,33 @@ def calc_difference_reward(g_reward, gw):
     """
     Calculate the difference reward for each agent
     """
-    difference_reward = np.zeros(len(gw.agents))
-
-    # Count number of agents at a target
-    for i in range(len(gw.agents)):
-        target_capture_counter = np.zeros(len(gw.targets))
-        for t_id, t_loc in enumerate(gw.targets):
-            for a_id, ag in enumerate(gw.agents):
-                if t_loc == gw.agents[ag].loc and a_id != i:  # Counterfactual that ignores contributions of agent i
-                    target_capture_counter[t_id] += 1
-
-        # Count how many targets are captured in counterfactual state
-        target_values = 0
-        for t_id, agent_count in enumerate(target_capture_counter):
-            if agent_count > 0:
-                target_values += gw.target_values[t_id]
-
-        counterfactual_global_reward = (target_values/np.sum(gw.target_values))*100
-        difference_reward[i] = g_reward - counterfactual_global_reward
+    # Removing agent i only changes the global reward when agent i is the only agent at its target
+    agent_targets = gw.get_agent_targets()
+    at_target = agent_targets >= 0
+    sole_occupant = np.zeros(len(agent_targets), dtype=bool)
+    sole_occupant[at_target] = gw.target_occupancy[agent_targets[at_target]] == 1
+
+    # Target value that is lost in the counterfactual state that ignores contributions of agent i
+    lost_value = np.zeros(len(agent_targets))
+    lost_value[sole_occupant] = gw.target_values[agent_targets[sole_occupant]]
+
+    counterfactual_global_reward = ((gw.captured_value - lost_value)/gw.total_value)*100
+    difference_reward = g_reward - counterfactual_global_reward
+
+    return difference_reward
+
+
+def calc_batch_difference_reward(g_rewards, gw, agent_targets, target_occupancy):
+    """
+    Calculate the difference reward for each agent in a batch of teams
+    """
+    at_target = agent_targets >= 0
+    safe_targets = np.where(at_target, agent_targets, 0)
+    sole_occupant = at_target & (np.take_along_axis(target_occupancy, safe_targets, axis=1) == 1)
+    lost_value = np.where(sole_occupant, gw.target_values[safe_targets], 0.0)
+
+    captured_value = gw.calculate_captured_value(target_occupancy)[:, None]
+    counterfactual_global_reward = ((captured_value - lost_value)/gw.total_value)*100
+    difference_reward = np.asarray(g_rewards)[:, None] - counterfactual_global_reward
 
     return difference_reward
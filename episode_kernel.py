@@ -0,0 +1,252 @@
+from checkpoint import save_checkpoint, load_checkpoint
+from exploration import ExplorationStreams
+import numpy as np
+import os
+
+try:
+    from numba import njit
+    numba_available = True
+except ImportError:  # Numba is optional, the kernels below are plain Python without it
+    numba_available = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Reward types understood by the episode kernels
+reward_codes = {"local": 0, "global": 1, "difference": 2, "cfl": 3}
+
+
+def select_backend(backend):
+    """
+    Return the backend that will be used for training, falling back to the NumPy trainer if Numba is not installed
+    """
+    if backend == "jit" and not numba_available:
+        print("Numba is not installed, falling back to the numpy backend")
+        return "numpy"
+
+    return backend
+
+
+@njit(cache=True)
+def captured_value_kernel(target_occupancy, target_values):
+    """
+    Sum of the values of targets with at least one agent on top of them, added in target order (like
+    GridWorld.calculate_captured_value)
+    """
+    captured_value = 0.0
+    for t_id in range(len(target_values)):
+        if target_occupancy[t_id] > 0:
+            captured_value += target_values[t_id]
+
+    return captured_value
+
+
+@njit(cache=True)
+def train_epoch_kernel(q_tables, initial_states, next_state, state_targets, target_values, total_value, reward_code,
+                       counterfactuals, team_potentials, use_potentials, alpha, discount, epsilon, explore_draws,
+                       random_actions):
+    """
+    Train the team for a single epoch: e-greedy selection, state transition, reward and Q update for every agent
+    """
+    n_steps, n_agents = explore_draws.shape
+    n_actions = q_tables.shape[2]
+    states = initial_states.copy()
+    prev_states = states.copy()
+    actions = np.zeros(n_agents, dtype=np.int64)
+    l_rewards = np.zeros(n_agents)
+
+    # Target occupancy at the start of the epoch
+    agent_targets = np.zeros(n_agents, dtype=np.int64)
+    target_occupancy = np.zeros(len(target_values), dtype=np.int64)
+    for i in range(n_agents):
+        t_id = state_targets[states[i]]
+        agent_targets[i] = t_id
+        if t_id >= 0:
+            target_occupancy[t_id] += 1
+    captured_value = captured_value_kernel(target_occupancy, target_values)
+
+    for t in range(n_steps):
+        # Choose actions and move every agent
+        moved_targets = False
+        for i in range(n_agents):
+            if explore_draws[t, i] <= epsilon:
+                action = random_actions[t, i]
+            else:
+                action = 0
+                for a in range(1, n_actions):
+                    if q_tables[i, states[i], a] > q_tables[i, states[i], action]:
+                        action = a
+            actions[i] = action
+            prev_states[i] = states[i]
+            states[i] = next_state[states[i], action]
+
+            # Update target occupancy
+            t_id = state_targets[states[i]]
+            old_t_id = agent_targets[i]
+            if t_id != old_t_id:
+                if old_t_id >= 0:
+                    target_occupancy[old_t_id] -= 1
+                if t_id >= 0:
+                    target_occupancy[t_id] += 1
+                agent_targets[i] = t_id
+                moved_targets = True
+            l_rewards[i] = target_values[t_id] if t_id >= 0 else 0.0
+
+        # Calculate agent rewards and update Q-Tables
+        if moved_targets:
+            captured_value = captured_value_kernel(target_occupancy, target_values)
+        g_reward = (captured_value/total_value)*100
+        for i in range(n_agents):
+            if reward_code == 0:
+                reward = l_rewards[i]
+            elif reward_code == 1:
+                reward = g_reward
+            else:
+                lost_value = 0.0
+                t_id = agent_targets[i]
+                if t_id >= 0 and target_occupancy[t_id] == 1:
+                    if reward_code == 2 or counterfactuals[i, t_id]:
+                        lost_value = target_values[t_id]
+                reward = g_reward - ((captured_value - lost_value)/total_value)*100
+            if use_potentials:
+                reward = reward + (0.9*team_potentials[i, states[i]] - team_potentials[i, prev_states[i]])
+
+            q_val = q_tables[i, prev_states[i], actions[i]]
+            max_q = q_tables[i, states[i], 0]
+            for a in range(1, n_actions):
+                if q_tables[i, states[i], a] > max_q:
+                    max_q = q_tables[i, states[i], a]
+            q_tables[i, prev_states[i], actions[i]] = ((1-alpha)*q_val) + alpha*(reward + (discount*max_q) - q_val)
+
+
+@njit(cache=True)
+def test_epoch_kernel(q_tables, initial_states, next_state, state_targets, target_values, total_value, n_steps):
+    """
+    Test the greedy solution of the team. Returns the global reward, the summed local reward of each agent, and the
+    (n_steps, n_agents) states visited and actions taken
+    """
+    n_agents = len(initial_states)
+    n_actions = q_tables.shape[2]
+    team_states = initial_states.copy()
+    l_rewards = np.zeros(n_agents)
+    states = np.zeros((n_steps, n_agents), dtype=np.int64)
+    actions = np.zeros((n_steps, n_agents), dtype=np.int64)
+
+    for t in range(n_steps):
+        for i in range(n_agents):
+            state = team_states[i]
+            states[t, i] = state
+            action = 0
+            for a in range(1, n_actions):
+                if q_tables[i, state, a] > q_tables[i, state, action]:
+                    action = a
+            actions[t, i] = action
+
+            team_states[i] = next_state[state, action]
+            t_id = state_targets[team_states[i]]
+            if t_id >= 0:
+                l_rewards[i] += target_values[t_id]
+
+    # Count how many unique targets are captured
+    target_occupancy = np.zeros(len(target_values), dtype=np.int64)
+    for i in range(n_agents):
+        t_id = state_targets[team_states[i]]
+        if t_id >= 0:
+            target_occupancy[t_id] += 1
+    captured_value = captured_value_kernel(target_occupancy, target_values)
+
+    return (captured_value/total_value)*100, l_rewards, states, actions
+
+
+def train_stat_run_kernel(gw, n_epochs, n_steps, reward_type, counterfactuals=None, team_potentials=None,
+                          eval_every=1, checkpoint_every=0, checkpoint_name=None, profiler=None, seed=None):
+    """
+    Train the team for a single stat run with the compiled episode kernels. Exploration is drawn from the same
+    per-agent random streams as the NumPy trainer, so both backends train on the same draws for a given seed.
+    Returns the same learning curves, solutions and evaluation mask as run_gridworld.train_stat_run. The steps of an
+    epoch all run inside one kernel call, so a profiler only sees the kernel as a whole
+    """
+    team = gw.team_learner
+    if not isinstance(team.q_tables, np.ndarray):
+        raise ValueError("The jit backend requires dense Q-Tables (create the GridWorld without sparse_q)")
+    potentials = team_potentials  # Saved with checkpoints as given
+    initial_states = np.asarray(gw.get_states([gw.agents[ag].initial_position for ag in gw.agents]), dtype=np.int64)
+    state_targets = np.asarray(gw.state_targets, dtype=np.int64)
+    target_values = np.asarray(gw.target_values, dtype=np.float64)
+    total_value = float(gw.total_value)
+    use_potentials = team_potentials is not None
+    if counterfactuals is None:
+        counterfactuals = np.zeros((1, 1), dtype=np.bool_)
+    if team_potentials is None:
+        team_potentials = np.zeros((1, 1))
+    counterfactuals = np.ascontiguousarray(counterfactuals, dtype=np.bool_)
+    team_potentials = np.ascontiguousarray(team_potentials, dtype=np.float64)
+
+    g_learning_curve = np.zeros(n_epochs)
+    l_learning_curve = np.zeros((team.n_agents, n_epochs))
+    best_solution = [[] for ag in range(team.n_agents)]
+    evaluated = np.zeros(n_epochs, dtype=bool)
+    rollout = None  # Last greedy rollout (global reward, local rewards, states and actions)
+    exploration = ExplorationStreams(seed, team.n_agents, n_steps, team.n_actions)
+
+    # Zero out the Q-Tables of the team for the new stat run, or continue from a checkpoint
+    team.reset_learner()
+    start_ep = 0
+    if checkpoint_name is not None and os.path.exists(checkpoint_name):
+        start_ep, g_learning_curve, l_learning_curve, best_solution, evaluated, rollout = \
+            load_checkpoint(checkpoint_name, team, potentials)
+        exploration.seek(start_ep)
+    profile = profiler is not None
+    for ep in range(start_ep, n_epochs):
+        if profile:
+            profiler.start_lap()
+        explore_draws, random_actions = exploration.draw_epoch()
+        if profile:
+            profiler.lap("exploration_draws")
+        train_epoch_kernel(team.q_tables, initial_states, gw.next_state, state_targets, target_values, total_value,
+                           reward_codes[reward_type], counterfactuals, team_potentials, use_potentials, team.alpha,
+                           team.discount, team.epsilon, explore_draws, random_actions)
+        if profile:
+            profiler.lap("train_kernel")
+
+        # Test agent solution on evaluation epochs, reusing the last rollout if its greedy path has not changed
+        if ep % eval_every == 0 or ep == n_epochs-1:
+            if rollout is None or not greedy_path_unchanged(team.q_tables, rollout):
+                rollout = test_epoch_kernel(team.q_tables, initial_states, gw.next_state, state_targets, target_values,
+                                            total_value, n_steps)
+            evaluated[ep] = True
+        g_reward, l_rewards, states, actions = rollout
+        if ep % (n_epochs-1) == 0:
+            for id in range(team.n_agents):
+                best_solution[id].extend(actions[:, id].tolist())
+        g_learning_curve[ep] = g_reward
+        l_learning_curve[:, ep] = l_rewards
+        if profile:
+            profiler.lap("evaluation")
+
+        if checkpoint_name is not None and checkpoint_every > 0 and (ep+1) % checkpoint_every == 0:
+            save_checkpoint(checkpoint_name, team, potentials, ep, g_learning_curve, l_learning_curve, best_solution,
+                            evaluated, rollout)
+            if profile:
+                profiler.lap("checkpoint")
+        if profile:
+            profiler.end_epoch(ep, n_steps, g_reward)
+
+    # The kernels write the Q-Tables directly, so bring the cached greedy actions up to date
+    team.rebuild_cache()
+
+    return g_learning_curve, l_learning_curve, best_solution, evaluated
+
+
+def greedy_path_unchanged(q_tables, rollout):
+    """
+    Check if the greedy action of every state visited by a previous rollout is the same (the kernels do not keep the
+    greedy action caches of the team up to date, so they are taken from the Q-Tables)
+    """
+    g_reward, l_rewards, states, actions = rollout
+    agent_ids = np.arange(q_tables.shape[0])
+
+    return np.array_equal(np.argmax(q_tables[agent_ids, states], axis=2), actions)
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class ExplorationStreams:
+    def __init__(self, seed, n_agents, n_steps, n_actions=5, block_size=1024):
+        """
+        Random streams used for e-greedy exploration during a stat run. Every agent draws from its own NumPy Generator
+        spawned from the seed, so the exploration of an agent only depends on the seed and its id (not on the size of
+        the team). Draws are made in blocks of whole epochs (about block_size steps) and handed out an epoch at a time.
+        Without a seed, the seed is drawn from NumPy's global random state so np.random.seed still makes runs
+        reproducible
+        """
+        if seed is None:
+            seed = int(np.random.randint(0, 2**32, dtype=np.int64))
+        self.seed = seed
+        self.n_agents = n_agents
+        self.n_steps = n_steps
+        self.n_actions = n_actions
+        self.block_epochs = max(1, block_size // n_steps)
+        self.generators = None
+        self.epoch = 0  # Next epoch handed out by draw_epoch
+        self.block_start = 0  # First epoch of the current block
+        self.explore_draws = None  # Uniform draws compared with epsilon (block_epochs*n_steps, n_agents)
+        self.random_actions = None  # Action taken by agents that explore (block_epochs*n_steps, n_agents)
+        self.seek(0)
+
+    def seek(self, epoch):
+        """
+        Move every stream to the start of an epoch (to continue a stat run from a checkpoint). Each step uses exactly
+        two draws of every agent's generator, so the generators are advanced instead of replaying earlier epochs
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(self.n_agents)
+        self.generators = [np.random.Generator(np.random.PCG64(agent_seed)) for agent_seed in seeds]
+        for generator in self.generators:
+            generator.bit_generator.advance(2*self.n_steps*epoch)
+        self.epoch = epoch
+        self.explore_draws = None
+        self.random_actions = None
+
+    def draw_block(self):
+        """
+        Draw the exploration decisions and random actions of every agent for the next block of epochs
+        """
+        n_block = self.block_epochs*self.n_steps
+        draws = np.empty((self.n_agents, n_block, 2))
+        for ag, generator in enumerate(self.generators):
+            generator.random(out=draws[ag])  # One draw for the decision and one for the action of each step
+
+        self.explore_draws = np.ascontiguousarray(draws[:, :, 0].T)
+        self.random_actions = np.ascontiguousarray((draws[:, :, 1].T*self.n_actions).astype(np.int64))
+        self.block_start = self.epoch
+
+    def draw_epoch(self):
+        """
+        Return the (n_steps, n_agents) exploration draws and random actions of the next epoch. An agent explores at a
+        step when its draw is at most epsilon
+        """
+        if self.explore_draws is None or self.epoch >= self.block_start + self.block_epochs:
+            self.draw_block()
+        first_step = (self.epoch - self.block_start)*self.n_steps
+        self.epoch += 1
+
+        return (self.explore_draws[first_step:first_step + self.n_steps],
+                self.random_actions[first_step:first_step + self.n_steps])
@@ -1,6 +1,8 @@
 import os
 import pickle
 import csv
+import json
+import numpy as np
 
 
 def create_pickle_file(input_data, dir_name, file_name):
@@ -29,3 +31,162 @@ def create_csv_file(input_array, dir_name, file_name):
         writer = csv.writer(csvfile)
         writer.writerow(input_array)
 
+
+def import_curve_data(file_path):
+    """
+    Load saved learning curves, memory-mapping .npy results so only the parts that are used are read from disk
+    (falls back to the pickle files written by older versions)
+    """
+    if os.path.exists(file_path + '.npy'):
+        return np.load(file_path + '.npy', mmap_mode='r')
+
+    data_file = open(file_path, 'rb')
+    pickle_data = pickle.load(data_file)
+    data_file.close()
+
+    return pickle_data
+
+
+def import_snapshots(dir_name, file_name):
+    """
+    Memory-map the final Q-Tables, (stat_runs, n_agents, n_states, n_actions), and greedy policies, (stat_runs,
+    n_agents, n_states), saved with a result. Nothing is read from disk until the arrays are indexed. Returns both
+    arrays and the metadata of the result
+    """
+    q_tables = np.load(os.path.join(dir_name, f'{file_name}_QTables.npy'), mmap_mode='r')
+    policies = np.load(os.path.join(dir_name, f'{file_name}_Policies.npy'), mmap_mode='r')
+    sidecar = load_sidecar(dir_name, f'{file_name}_Policies')
+
+    return q_tables, policies, sidecar["metadata"]
+
+
+def import_evaluated_epochs(dir_name, file_name):
+    """
+    Memory-map the (stat_runs, n_epochs) mask of the epochs whose learning curve entries were measured, the other
+    entries repeat the last measured reward. Returns None for results saved without a mask (every epoch was measured)
+    """
+    path_name = os.path.join(dir_name, f'{file_name}_Evaluated.npy')
+    if not os.path.exists(path_name):
+        return None
+
+    return np.load(path_name, mmap_mode='r')
+
+
+def load_sidecar(dir_name, file_name):
+    """
+    Load the JSON sidecar of a result file, or None if it does not exist
+    """
+    sidecar_name = os.path.join(dir_name, f'{file_name}.json')
+    if not os.path.exists(sidecar_name):
+        return None
+
+    with open(sidecar_name) as json_file:
+        return json.load(json_file)
+
+
+class StreamingArrayFile:
+    def __init__(self, dir_name, file_name, shape, run_axis=0, metadata=None, dtype=np.float64, resume=False):
+        """
+        Preallocate a memory-mapped .npy file that results are written into one stat run at a time, with a JSON
+        sidecar recording the shape, metadata, and which stat runs are complete. With resume, an existing file written
+        with the same shape and metadata is reopened and keeps its completed stat runs
+        """
+        if not os.path.exists(dir_name):  # If Data directory does not exist, create it
+            os.makedirs(dir_name)
+
+        self.path_name = os.path.join(dir_name, f'{file_name}.npy')
+        self.sidecar_name = os.path.join(dir_name, f'{file_name}.json')
+        self.run_axis = run_axis  # Axis of the array indexed by stat run
+        self.sidecar = {"shape": list(shape), "dtype": np.dtype(dtype).str, "run_axis": run_axis,
+                        "completed_runs": [], "metadata": metadata if metadata is not None else {}}
+        self.sidecar = json.loads(json.dumps(self.sidecar))  # Compare with a loaded sidecar in its JSON form
+
+        existing_sidecar = load_sidecar(dir_name, file_name)
+        if resume and existing_sidecar is not None and os.path.exists(self.path_name):
+            for key in ["shape", "dtype", "run_axis", "metadata"]:
+                if existing_sidecar[key] != self.sidecar[key]:
+                    raise ValueError(f'Cannot resume {self.path_name}, it was written with a different {key}: '
+                                     f'{existing_sidecar[key]} (expected {self.sidecar[key]})')
+            self.sidecar = existing_sidecar
+            self.array = np.lib.format.open_memmap(self.path_name, mode='r+')
+        else:
+            self.array = np.lib.format.open_memmap(self.path_name, mode='w+', dtype=dtype, shape=tuple(shape))
+            self.write_sidecar()
+
+    def completed_runs(self):
+        """
+        Stat runs whose results have been written
+        """
+        return set(self.sidecar["completed_runs"])
+
+    def write_run(self, sr, run_data):
+        """
+        Write the results of a stat run and flush them to disk before marking the stat run as complete
+        """
+        self.array[(slice(None),)*self.run_axis + (sr,)] = run_data
+        self.array.flush()
+        if sr not in self.sidecar["completed_runs"]:
+            self.sidecar["completed_runs"].append(sr)
+        self.write_sidecar()
+
+    def write_sidecar(self):
+        """
+        Replace the JSON sidecar atomically so it never describes a partially written stat run
+        """
+        tmp_name = self.sidecar_name + '.tmp'
+        with open(tmp_name, 'w') as json_file:
+            json.dump(self.sidecar, json_file, indent=2)
+        os.replace(tmp_name, self.sidecar_name)
+
+
+def truncate_csv_rows(file_name, n_rows):
+    """
+    Keep only the first n_rows rows of a CSV file (rows written after the last completed stat run are dropped). The
+    file is rewritten atomically
+    """
+    if not os.path.exists(file_name):
+        return
+
+    with open(file_name, newline='') as csvfile:
+        rows = list(csv.reader(csvfile))
+    if len(rows) > n_rows:
+        with open(file_name + '.tmp', 'w', newline='') as csvfile:
+            csv.writer(csvfile).writerows(rows[:n_rows])
+        os.replace(file_name + '.tmp', file_name)
+
+
+class BufferedCSVWriter:
+    def __init__(self, dir_name, file_name, buffer_rows=100):
+        """
+        Append rows to a CSV file in the specified directory, writing them in bulk instead of opening the file per row
+        """
+        if not os.path.exists(dir_name):  # If Data directory does not exist, create it
+            os.makedirs(dir_name)
+
+        self.file_name = os.path.join(dir_name, file_name)
+        self.buffer_rows = buffer_rows
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def writerow(self, row):
+        """
+        Buffer a row, writing the buffer to the file once it is full
+        """
+        self.rows.append(row)
+        if len(self.rows) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all buffered rows to the file
+        """
+        if self.rows:
+            with open(self.file_name, 'a+', newline='') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerows(self.rows)
+            self.rows = []
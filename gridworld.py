@@ -1,20 +1,82 @@
-from agent import QLearner
-import random
+from agent import QLearner, TeamQLearner, SparseQLearner, SparseTeamQLearner
+from world_cache import cached_target_values
+from world_generator import generate_world, generate_center_world
+from world_file import save_world_file, load_world_file
 import numpy as np
 import os
 import csv
 
 
 class GridWorld:
-    def __init__(self, width, height):
+    def __init__(self, width, height, q_dtype=np.float64, sparse_q=False):
         self.width = width
         self.height = height
         self.n_states = height * width
         self.reward = 10
         self.agents = {}  # Dictionary for agent objects
+        self.q_dtype = q_dtype  # Data type of agent Q-tables (float64 or float32)
+        self.sparse_q = sparse_q  # Allocate Q-table rows in pages on first visit instead of dense Q-tables
+        self.team_learner = None  # Team Q-learner that owns the Q-tables of all agents
         self.targets = []  # Coordinates of targets in the Gridworld
         self.target_values = None
+        self.target_grid = None  # Target id of each cell (-1 for cells without a target)
+        self.reward_grid = None  # Target value of each cell (0 for cells without a target)
+        self.total_value = None  # Sum of all target values
+        self.agent_states = None  # State of each agent (agent locations are read from here)
+        self.initial_states = None  # State each agent starts an epoch in
+        self.agent_targets = None  # Target id each agent is on top of (-1 for agents that are not at a target)
+        self.target_occupancy = None  # Number of agents at each target
+        self.captured_value = 0  # Sum of the values of targets with at least one agent on top of them
         self.walls = []  # Coordinates of cells that are walls in the Gridworld
+        self.wall_grid = np.zeros((width, height), dtype=bool)  # True for cells that are walls
+        self.moves = np.array([[0, 1], [0, -1], [-1, 0], [1, 0], [0, 0]])  # Up, Down, Left, Right, Stationary
+        self.next_state = None  # State reached from each state by each action (n_states, n_actions)
+        self.state_coords = None  # [x, y] coordinates of each state
+        self.state_targets = None  # Target id of each state (-1 for states without a target)
+        self.state_rewards = None  # Target value of each state (0 for states without a target)
+        self.create_transition_table()
+
+    def get_states(self, positions):
+        """
+        Convert [x, y] coordinates (the last axis of positions) to state ids
+        """
+        positions = np.asarray(positions)
+        return positions[..., 0] + self.width * positions[..., 1]
+
+    def create_transition_table(self):
+        """
+        Precompute the state reached from every state by every action. Moves into the world boundaries or a wall
+        leave the agent where it is
+        """
+        x, y = np.meshgrid(np.arange(self.width), np.arange(self.height), indexing='ij')
+        x = x.ravel()
+        y = y.ravel()
+        states = x + self.width * y
+
+        self.state_coords = np.zeros((self.n_states, 2), dtype=int)
+        self.state_coords[states, 0] = x
+        self.state_coords[states, 1] = y
+        self.next_state = np.zeros((self.n_states, len(self.moves)), dtype=np.int32)
+        for action, (dx, dy) in enumerate(self.moves):
+            new_x = x + dx
+            new_y = y + dy
+            collision = (new_x < 0) | (new_x >= self.width) | (new_y < 0) | (new_y >= self.height)
+            collision[~collision] = self.wall_grid[new_x[~collision], new_y[~collision]]
+            self.next_state[states, action] = np.where(collision, states, new_x + self.width * new_y)
+
+    def set_walls(self, walls):
+        """
+        Replace the walls of the Gridworld and rebuild the state transition table
+        """
+        walls = [[int(x), int(y)] for x, y in walls]
+        if not walls and not self.walls:  # The transition table is already built without walls
+            return
+
+        self.walls = walls
+        self.wall_grid = np.zeros((self.width, self.height), dtype=bool)
+        wall_locs = np.asarray(self.walls, dtype=int).reshape(-1, 2)
+        self.wall_grid[wall_locs[:, 0], wall_locs[:, 1]] = True
+        self.create_transition_table()
 
     def assign_target_values(self, n_targets):
         """
@@ -39,92 +101,86 @@ class GridWorld:
         print("Target Values: ", self.target_values)
         print("Total Value: ", sum(self.target_values))
 
-    def create_world(self, n_agents, n_targets):
-        for t in range(n_targets):
-            x = random.randint(0, self.width-1)
-            y = random.randint(0, self.height-1)
-
-            # Make sure targets are not placed on top of each other
-            while [x, y] in self.targets:
-                x = random.randint(0, self.width-1)
-                y = random.randint(0, self.height-1)
-
-            self.targets.append([x, y])
-
-        a_loc = []  # Agent locations
-        for a in range(n_agents):
-            x = random.randint(0, self.width-1)
-            y = random.randint(0, self.height-1)
-
-            # Make sure agents do not start out on top of other agents or targets
-            while [x, y] in self.targets or [x, y] in a_loc:
-                x = random.randint(0, self.width-1)
-                y = random.randint(0, self.height-1)
+        self.create_target_grid()
 
-            a_loc.append([x, y])
-            self.agents[f'A{a}'] = QLearner(self.width*self.height, x, y)
+    def create_target_grid(self):
+        """
+        Create lookup grids that map each cell of the Gridworld to a target id and target value
+        """
+        self.target_grid = np.full((self.width, self.height), -1, dtype=int)
+        self.reward_grid = np.zeros((self.width, self.height))
+
+        target_locs = np.asarray(self.targets, dtype=int).reshape(-1, 2)
+        self.target_grid[target_locs[:, 0], target_locs[:, 1]] = np.arange(len(target_locs))
+        if self.target_values is not None:
+            self.reward_grid[target_locs[:, 0], target_locs[:, 1]] = self.target_values
+            self.total_value = np.sum(self.target_values)
+
+        # The same lookups indexed by state
+        self.state_targets = np.full(self.n_states, -1, dtype=int)
+        self.state_rewards = np.zeros(self.n_states)
+        states = self.get_states(self.state_coords)
+        self.state_targets[states] = self.target_grid[self.state_coords[:, 0], self.state_coords[:, 1]]
+        self.state_rewards[states] = self.reward_grid[self.state_coords[:, 0], self.state_coords[:, 1]]
+
+    def create_world(self, n_agents, n_targets, config_dir='World_Config', seed=None):
+        """
+        Create Gridworld where targets and agents are placed at random (see world_generator.generate_world)
+        """
+        self.targets, a_loc = generate_world(self.width, self.height, n_agents, n_targets, seed, self.wall_grid)
+        self.create_target_grid()
+        self.create_agents(a_loc)
 
-        self.save_configuration()
+        self.save_configuration(config_dir)
 
-    def create_center_world(self, n_agents, n_targets, min_dist_center):
+    def create_center_world(self, n_agents, n_targets, min_dist_center, config_dir='World_Config', seed=None):
         """
-        Create Gridworld where agents all start in the center
+        Create Gridworld where agents all start in the center (see world_generator.generate_center_world)
         """
+        self.targets, a_loc = generate_center_world(self.width, self.height, n_agents, n_targets, min_dist_center,
+                                                    seed, self.wall_grid)
         center_x = int(self.width/2)
         center_y = int(self.height/2)
+        print([abs(x - center_x) + abs(y - center_y) for x, y in self.targets])
+        self.create_target_grid()
+        self.create_agents(a_loc)
 
-        # Four distant targets
-        target_distances = []
-        for i in range(4):
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            dist_to_center = abs(x - center_x) + abs(y - center_y)
-
-            while dist_to_center < min_dist_center or [x, y] in self.targets:
-                x = random.randint(0, self.width - 1)
-                y = random.randint(0, self.height - 1)
-                dist_to_center = abs(x - center_x) + abs(y - center_y)
-
-            self.targets.append([x, y])
-            target_distances.append(dist_to_center)
-
-        # Other targets (low value targets)
-        t = 4
-        while t < n_targets:
-            x = random.randint(2, self.width - 2)
-            y = random.randint(2, self.height - 2)
-            dist_to_center = abs(x - center_x) + abs(y - center_y)
-
-            # Make sure targets are not placed on top of each other
-            while [x, y] in self.targets or dist_to_center >= min_dist_center - 3 or dist_to_center == 0:
-                x = random.randint(2, self.width - 2)
-                y = random.randint(2, self.height - 2)
-                dist_to_center = abs(x - center_x) + abs(y - center_y)
-
-            target_distances.append(dist_to_center)
-
-            self.targets.append([x, y])
-            t += 1
-        print(target_distances)
-
-        a_loc = []  # Agent locations
-        for a in range(n_agents):
-            a_loc.append([center_x, center_y])
-            self.agents[f'A{a}'] = QLearner(self.width*self.height, center_x, center_y)
+        self.save_configuration(config_dir)
 
-        self.save_configuration()
-
-    def save_configuration(self):
+    def create_agents(self, agent_locs):
+        """
+        Create agents at the given locations. Agent Q-tables are views into a single team Q-table (or share the paged
+        Q-tables of the team when sparse_q is set)
+        """
+        self.agents = {}
+        if self.sparse_q:
+            self.team_learner = SparseTeamQLearner(len(agent_locs), self.n_states, dtype=self.q_dtype)
+            for a_id, (x, y) in enumerate(agent_locs):
+                q_store, table_id = self.team_learner.get_agent_view(a_id)
+                self.agents[f'A{a_id}'] = SparseQLearner(self.n_states, x, y, q_store=q_store, table_id=table_id)
+        else:
+            self.team_learner = TeamQLearner(len(agent_locs), self.n_states, dtype=self.q_dtype)
+            for a_id, (x, y) in enumerate(agent_locs):
+                q_table = self.team_learner.get_agent_view(a_id)
+                q_cache = self.team_learner.get_agent_cache(a_id)
+                self.agents[f'A{a_id}'] = QLearner(self.n_states, x, y, q_table=q_table, q_cache=q_cache)
+        for a_id, ag in enumerate(self.agents):
+            self.agents[ag].world = self
+            self.agents[ag].agent_id = a_id
+        self.initial_states = self.get_states(np.array(agent_locs, dtype=int).reshape(-1, 2))
+        self.reset_agents()
+
+    def save_configuration(self, dir_name='World_Config'):
         """
         Save the Gridworld configuration to a CSV file
         """
-        dir_name = 'World_Config'  # Intended directory for output files
 
         if not os.path.exists(dir_name):  # If Data directory does not exist, create it
             os.makedirs(dir_name)
 
         tfile_name = os.path.join(dir_name, f'Target_Config.csv')
         afile_name = os.path.join(dir_name, f'Agent_Config.csv')
+        wfile_name = os.path.join(dir_name, f'Wall_Config.csv')
 
         with open(tfile_name, 'w', newline='') as csvfile:
             writer = csv.writer(csvfile)
@@ -136,103 +192,263 @@ class GridWorld:
             for ag in self.agents:
                 writer.writerow(self.agents[ag].loc)
 
-        csvfile.close()
+        # Worlds without walls have no wall file (so configurations from before walls were added are unchanged)
+        if self.walls:
+            with open(wfile_name, 'w', newline='') as csvfile:
+                writer = csv.writer(csvfile)
+                for w_loc in self.walls:
+                    writer.writerow(w_loc)
+        elif os.path.exists(wfile_name):
+            os.remove(wfile_name)
 
-    def load_configuration(self, n_agents, n_targets):
+    def load_configuration(self, n_agents, n_targets, dir_name='World_Config', cache_dir=None):
         """
-        Load Gridworld configuration from CSV files
+        Load Gridworld configuration from CSV files (target values are loaded from cache_dir if it is provided). Walls
+        are loaded from Wall_Config.csv if the configuration has any
         """
-        csv_target_input = []
-        csv_agent_input = []
+        # Load walls first, target values cached by world_cache depend on them
+        wfile_name = os.path.join(dir_name, 'Wall_Config.csv')
+        if os.path.exists(wfile_name):
+            with open(wfile_name) as csvfile:
+                csv_reader = csv.reader(csvfile, delimiter=',')
+                self.set_walls([[int(float(row[0])), int(float(row[1]))] for row in csv_reader if row])
 
         # Load target information
-        with open(f'World_Config/Target_Config.csv') as csvfile:
-            csv_reader = csv.reader(csvfile, delimiter=',')
-
-            for row in csv_reader:
-                csv_target_input.append(row)
-
-        for target_id in range(n_targets):
-            tx = float(csv_target_input[target_id][0])
-            ty = float(csv_target_input[target_id][1])
-
-            self.targets.append([int(tx), int(ty)])
+        target_locs = read_config_rows(os.path.join(dir_name, 'Target_Config.csv'), n_targets)
+        self.targets.extend(target_locs.tolist())
 
         # Assign values to targets
-        self.assign_target_values(n_targets)
+        if cache_dir is None:
+            self.assign_target_values(n_targets)
+        else:
+            self.target_values = cached_target_values(self, cache_dir)
+            self.create_target_grid()
 
         # Load agent information
-        with open(f'World_Config/Agent_Config.csv') as csvfile:
-            csv_reader = csv.reader(csvfile, delimiter=',')
+        agent_locs = read_config_rows(os.path.join(dir_name, 'Agent_Config.csv'), n_agents)
+        self.check_walls(np.concatenate((target_locs, agent_locs)), dir_name)
+        self.create_agents(agent_locs.tolist())
 
-            for row in csv_reader:
-                csv_agent_input.append(row)
+    def save_world(self, path):
+        """
+        Save the Gridworld configuration, including target values and walls, to a binary world file (see world_file)
+        """
+        if self.target_values is None:
+            raise ValueError("Target values must be assigned before the world is saved")
 
-        for agent_id in range(n_agents):
-            ax = float(csv_agent_input[agent_id][0])
-            ay = float(csv_agent_input[agent_id][1])
+        agent_locs = [self.agents[ag].initial_position for ag in self.agents]
+        save_world_file(path, self.width, self.height, self.targets, self.target_values, agent_locs, self.walls)
 
-            self.agents[f'A{agent_id}'] = QLearner(self.width*self.height, int(ax), int(ay))
+    def load_world(self, path, n_agents=None, n_targets=None):
+        """
+        Load a Gridworld configuration from a binary world file, using the first n_agents agents and n_targets targets
+        (all of them by default). Target values are read from the file instead of being recomputed
+        """
+        world = load_world_file(path)
+        if (int(world["width"]), int(world["height"])) != (self.width, self.height):
+            raise ValueError(f'{path} holds a {int(world["width"])}x{int(world["height"])} world, '
+                             f'not {self.width}x{self.height}')
+        for key, n_rows in [("targets", n_targets), ("agents", n_agents)]:
+            if n_rows is not None and n_rows > len(world[key]):
+                raise ValueError(f'{path} only holds {len(world[key])} {key} ({n_rows} requested)')
+
+        target_locs = world["targets"][:n_targets]
+        agent_locs = world["agents"][:n_agents]
+        self.set_walls(world["walls"])
+        self.check_walls(np.concatenate((target_locs, agent_locs)), path)
+        self.targets = target_locs.tolist()
+        self.target_values = world["target_values"][:n_targets]
+        self.create_target_grid()
+        self.create_agents(agent_locs.tolist())
+
+    def check_walls(self, locs, source):
+        """
+        Make sure no [x, y] location (targets and agents of a loaded configuration) is inside a wall
+        """
+        locs = np.asarray(locs, dtype=int).reshape(-1, 2)
+        in_wall = self.wall_grid[locs[:, 0], locs[:, 1]]
+        if np.any(in_wall):
+            raise ValueError(f'The configuration in {source} places a target or agent inside the wall at '
+                             f'{locs[np.argmax(in_wall)].tolist()}')
 
     def check_collision(self, x, y):
         """
-        Check for collision with world boundaries
+        Check for collision with world boundaries and walls
         """
         if x < 0 or x >= self.width:
             return True
         elif y < 0 or y >= self.height:
             return True
         else:
-            return False
+            return bool(self.wall_grid[x, y])
 
     def step(self, agent_state, action):
         """
         Agent provides an action, step function provides state-transition and reward
         """
-        x, y = agent_state
-
-        # Provide state-transition for agent
-        if action == 0:  # Up
-            collision = self.check_collision(x, y+1)
-            if not collision:
-                y += 1
-        elif action == 1:  # Down
-            collision = self.check_collision(x, y-1)
-            if not collision:
-                y -= 1
-        elif action == 2:  # Left
-            collision = self.check_collision(x-1, y)
-            if not collision:
-                x -= 1
-        elif action == 3:  # Right
-            collision = self.check_collision(x+1, y)
-            if not collision:
-                x += 1
+        new_state = self.next_state[self.get_states(agent_state), action]
+        x, y = self.state_coords[new_state].tolist()
 
         # Return local agent reward and new agent state
-        if [x, y] in self.targets:
-            t_id = self.targets.index([x, y])
+        t_id = self.state_targets[new_state]
+        if t_id >= 0:
             return self.target_values[t_id], [x, y]
         else:
             return 0, [x, y]
 
+    def step_states(self, states, actions):
+        """
+        Step the whole team on flat state ids with a single lookup in the transition table. States and actions have one
+        entry per agent (or (n_batch, n_agents) entries for a batch of teams). Returns local agent rewards and new
+        states
+        """
+        new_states = self.next_state[states, actions]
+
+        return self.state_rewards[new_states], new_states
+
+    def step_team(self, positions, actions):
+        """
+        Vectorized step function for the whole team. Positions is an (n_agents, 2) array of agent [x, y]
+        coordinates and actions is a vector with one action per agent. Returns local agent rewards and new positions.
+        A batch of teams can be stepped at once with (n_batch, n_agents, 2) positions and (n_batch, n_agents) actions
+        """
+        rewards, new_states = self.step_states(self.get_states(positions), actions)
+
+        return rewards, self.state_coords[new_states]
+
+    def get_team_positions(self):
+        """
+        Return the current agent locations as an (n_agents, 2) array
+        """
+        return self.state_coords[self.agent_states]
+
+    def get_team_states(self):
+        """
+        Return the state of every agent at its current location
+        """
+        return self.agent_states.copy()
+
+    def get_agent_position(self, a_id):
+        """
+        Return the [x, y] location of a single agent
+        """
+        return self.state_coords[self.agent_states[a_id]].tolist()
+
+    def move_agent(self, a_id, loc):
+        """
+        Move a single agent to an [x, y] location and update target occupancy (used when Agent.loc is assigned)
+        """
+        x, y = loc
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f'Agent location {[x, y]} is outside the {self.width}x{self.height} Gridworld')
+        states = self.agent_states.copy()
+        states[a_id] = x + self.width*y
+        self.move_team_states(states)
+
+    def reset_occupancy(self):
+        """
+        Rebuild the target occupancy counts from the current agent states
+        """
+        self.agent_targets = self.state_targets[self.agent_states]
+        self.target_occupancy = np.bincount(self.agent_targets[self.agent_targets >= 0], minlength=len(self.targets))
+        if self.target_values is not None:
+            self.captured_value = self.calculate_captured_value(self.target_occupancy)
+
+    def reset_agents(self):
+        """
+        Reset all agents to their initial positions and reset target occupancy to match
+        """
+        self.agent_states = self.initial_states.copy()
+        self.reset_occupancy()
+
+    def move_team(self, positions):
+        """
+        Move agents to new positions and incrementally update target occupancy for agents that changed targets
+        """
+        self.move_team_states(self.get_states(positions))
+
+    def move_team_states(self, states):
+        """
+        Move agents to new states and incrementally update target occupancy for agents that changed targets. Every
+        change of agent location goes through here, so the global reward always matches the agent locations
+        """
+        self.agent_states = np.array(states, dtype=int)
+        new_targets = self.state_targets[self.agent_states]
+        changed = new_targets != self.agent_targets
+        if not changed.any():
+            return
+
+        old_ids = self.agent_targets[changed]
+        new_ids = new_targets[changed]
+        np.subtract.at(self.target_occupancy, old_ids[old_ids >= 0], 1)
+        np.add.at(self.target_occupancy, new_ids[new_ids >= 0], 1)
+        self.agent_targets = new_targets
+        self.captured_value = self.calculate_captured_value(self.target_occupancy)
+
+    def get_agent_targets(self):
+        """
+        Return the id of the target each agent is on top of (-1 for agents that are not at a target)
+        """
+        return self.agent_targets
+
+    def get_batch_occupancy(self, states):
+        """
+        Return the target id of each agent and the number of agents at each target for a batch of teams with
+        (n_batch, n_agents) states
+        """
+        n_batch = len(states)
+        n_targets = len(self.targets)
+        agent_targets = self.state_targets[states]
+        at_target = agent_targets >= 0
+        batch_target_ids = (np.arange(n_batch)[:, None] * n_targets + agent_targets)[at_target]
+        target_occupancy = np.bincount(batch_target_ids, minlength=n_batch*n_targets).reshape(n_batch, n_targets)
+
+        return agent_targets, target_occupancy
+
+    def calculate_captured_value(self, target_occupancy):
+        """
+        Sum of the values of targets with at least one agent on top of them (one sum per team for a batch of teams).
+        Values are added one target at a time in target order like the original reward loop, so the global reward is
+        exactly the same for float target values too
+        """
+        return np.cumsum(np.where(target_occupancy > 0, self.target_values, 0.0), axis=-1)[..., -1]
+
+    def calculate_batch_g_reward(self, target_occupancy):
+        """
+        Calculate the global reward for each team in a batch from its (n_batch, n_targets) target occupancy
+        """
+        global_reward = (self.calculate_captured_value(target_occupancy)/self.total_value)*100
+
+        return global_reward
+
     def calculate_g_reward(self):
         """
         Calculate the global reward for the team of agents
         """
-        # Count number of agents at a target
-        target_capture_counter = np.zeros(len(self.targets))
-        for t_id, t_loc in enumerate(self.targets):
-            for ag in self.agents:
-                if t_loc == self.agents[ag].loc:
-                    target_capture_counter[t_id] += 1
+        # Target occupancy and the captured value are kept up to date as agents move, so they only need to be read
+        global_reward = (self.captured_value/self.total_value)*100
 
-        # Count how many unique targets are captured
-        target_values = 0
-        for t_id, agent_count in enumerate(target_capture_counter):
-            if agent_count > 0:
-                target_values += self.target_values[t_id]
+        return global_reward
 
-        global_reward = (target_values/np.sum(self.target_values))*100
 
-        return global_reward
+def read_config_rows(file_name, n_rows):
+    """
+    Read the first n_rows [x, y] locations of a configuration CSV file as an (n_rows, 2) integer array
+    """
+    locs = np.loadtxt(file_name, delimiter=',', ndmin=2)
+    if len(locs) < n_rows:
+        raise ValueError(f'{file_name} only holds {len(locs)} locations ({n_rows} requested)')
+
+    return locs[:n_rows, :2].astype(int)
+
+
+def import_csv_world(config_dir, path, width, height, n_agents, n_targets):
+    """
+    Convert a CSV world configuration (Target_Config.csv, Agent_Config.csv and Wall_Config.csv) into a binary world
+    file, assigning target values the same way load_configuration does
+    """
+    gw = GridWorld(width, height)
+    gw.load_configuration(n_agents, n_targets, config_dir)
+    gw.save_world(path)
+
+    return gw
@@ -44,6 +44,16 @@ class PBRS:
         elif ptype == "custom":
             self.custom_potential(gw, agent_id)
 
+    def get_cell_states(self, gw):
+        """
+        Return the x and y coordinates of every cell in the Gridworld along with the state of each cell
+        """
+        x, y = np.meshgrid(np.arange(gw.width), np.arange(gw.height), indexing='ij')
+        x = x.ravel()
+        y = y.ravel()
+
+        return x, y, x + gw.width * y
+
     def exploration_potential(self, gw, nsteps):
         """
         Potential function that incentivizes agents travelling away from the center and towards targets
@@ -51,78 +61,87 @@ class PBRS:
         center_x = int(gw.width/2)
         center_y = int(gw.height/2)
 
-        for x in range(gw.width):
-            for y in range(gw.height):
-                state = x + gw.height * y
-                x_dist = abs(x - center_x)
-                y_dist = abs(y - center_y)
-                self._initial_potentials[state] = (x_dist + y_dist)/nsteps
-
+        x, y, states = self.get_cell_states(gw)
+        self._initial_potentials[states] = (np.abs(x - center_x) + np.abs(y - center_y))/nsteps
         self.state_potentials = self._initial_potentials.copy()
 
     def custom_potential(self, gw, agent_id):
         """
         Use customized potential function (assign 1 agent to a target)
         """
-        poi_state_potentials = [[] for i in range(self.n_states)]
-        agent_loc = gw.agents[f'A{agent_id}'].initial_position
-        for t_id, t_loc in enumerate(gw.targets):
-            for x in range(gw.width):
-                for y in range(gw.height):
-                    state = x + gw.height * y
-                    target_state_dist = abs(x - t_loc[0]) + abs(y - t_loc[1])
-                    state_agent_dist = abs(agent_loc[0] - x) + abs(agent_loc[1] - y)
-                    target_agent_dist = abs(agent_loc[0] - t_loc[0]) + abs(agent_loc[1] - t_loc[1])
-
-                    if (target_state_dist + state_agent_dist) == target_agent_dist and t_id == agent_id:
-                        potential = gw.target_values[t_id]*(1 - (target_state_dist / target_agent_dist))
-                    else:
-                        potential = 0.0
-                    poi_state_potentials[state].append(potential)
-
-        for state in range(self.n_states):
-            self._initial_potentials[state] = max(poi_state_potentials[state])
+        self._initial_potentials = np.zeros(self.n_states)
+
+        # Only the target assigned to this agent contributes potential, every other target contributes 0
+        if agent_id < len(gw.targets):
+            agent_loc = gw.agents[f'A{agent_id}'].initial_position
+            t_loc = gw.targets[agent_id]
+            x, y, states = self.get_cell_states(gw)
+            target_state_dist = np.abs(x - t_loc[0]) + np.abs(y - t_loc[1])
+            state_agent_dist = np.abs(agent_loc[0] - x) + np.abs(agent_loc[1] - y)
+            target_agent_dist = abs(agent_loc[0] - t_loc[0]) + abs(agent_loc[1] - t_loc[1])
+
+            # States on a shortest path between the agent and its target
+            on_path = (target_state_dist + state_agent_dist) == target_agent_dist
+            potential = gw.target_values[agent_id]*(1 - (target_state_dist / max(target_agent_dist, 1)))
+            self._initial_potentials[states] = np.where(on_path, np.maximum(potential, 0.0), 0.0)
+
         self.state_potentials = self._initial_potentials.copy()
 
     def target_proximity_potential(self, gw, n_steps):
         """
         Potential function that evaluates state potential based on proximity to nearby targets
         """
-        poi_state_potentials = [[] for i in range(self.n_states)]
-        for t_id, t_loc in enumerate(gw.targets):
-            for x in range(gw.width):
-                for y in range(gw.height):
-                    state = x + gw.height * y
-                    x_dist = abs(x - t_loc[0])
-                    y_dist = abs(y - t_loc[1])
-                    poi_state_distance = x_dist + y_dist
-                    potential = (1 - (poi_state_distance/n_steps))
-                    poi_state_potentials[state].append(potential)
-
-        for state in range(self.n_states):
-            self._initial_potentials[state] = np.mean(poi_state_potentials[state])
+        target_locs = np.asarray(gw.targets, dtype=int).reshape(-1, 2)
+
+        # Distances are separable, so the summed distance to all targets is a sum over x plus a sum over y
+        x_dist = np.abs(np.arange(gw.width)[:, None] - target_locs[None, :, 0]).sum(axis=1)
+        y_dist = np.abs(np.arange(gw.height)[:, None] - target_locs[None, :, 1]).sum(axis=1)
+
+        x, y, states = self.get_cell_states(gw)
+        mean_distance = (x_dist[x] + y_dist[y])/len(target_locs)
+        self._initial_potentials[states] = 1 - (mean_distance/n_steps)
         self.state_potentials = self._initial_potentials.copy()
 
     def target_agent_distance(self, gw, agent_id):
         """
         Potential function that incentivizes agent travelling directly towards targets
         """
-        poi_state_potentials = [[] for i in range(self.n_states)]
         agent_loc = gw.agents[f'A{agent_id}'].initial_position
-        for t_id, t_loc in enumerate(gw.targets):
-            for x in range(gw.width):
-                for y in range(gw.height):
-                    state = x + gw.height * y
-                    target_state_dist = abs(x - t_loc[0]) + abs(y - t_loc[1])
-                    state_agent_dist = abs(agent_loc[0] - x) + abs(agent_loc[1] - y)
-                    target_agent_dist = abs(agent_loc[0] - t_loc[0]) + abs(agent_loc[1] - t_loc[1])
-
-                    if (target_state_dist + state_agent_dist) == target_agent_dist:
-                        potential = 1 - (target_state_dist / (target_state_dist + state_agent_dist))
-                    else:
-                        potential = 0.0
-                    poi_state_potentials[state].append(potential)
-
-        for state in range(self.n_states):
-            self._initial_potentials[state] = max(poi_state_potentials[state])
+        x, y, states = self.get_cell_states(gw)
+        state_agent_dist = np.abs(agent_loc[0] - x) + np.abs(agent_loc[1] - y)
+
+        # Keep a running maximum over targets so memory stays O(n_states)
+        max_potential = np.zeros(self.n_states)
+        for t_loc in gw.targets:
+            target_state_dist = np.abs(x - t_loc[0]) + np.abs(y - t_loc[1])
+            target_agent_dist = abs(agent_loc[0] - t_loc[0]) + abs(agent_loc[1] - t_loc[1])
+
+            on_path = (target_state_dist + state_agent_dist) == target_agent_dist
+            potential = np.where(on_path, 1 - (target_state_dist / max(target_agent_dist, 1)), 0.0)
+            np.maximum(max_potential, potential, out=max_potential)
+
+        self._initial_potentials[states] = max_potential
         self.state_potentials = self._initial_potentials.copy()
+
+
+def create_team_potentials(gw, n_agents, n_steps, ptype):
+    """
+    Set the potentials of every agent and stack them into an (n_agents, n_states) array
+    """
+    agent_pbrs = {f'P{ag}': PBRS(gw.n_states) for ag in range(n_agents)}
+    for id, ag in enumerate(agent_pbrs):
+        agent_pbrs[ag].set_potentials(gw, id, n_steps, ptype)
+
+    return np.array([agent_pbrs[ag].state_potentials for ag in agent_pbrs])
+
+
+def team_potential_function(team_potentials, current_states, prev_states, discount=0.9):
+    """
+    Calculates the change in potential over a state transition for every agent in the team
+    """
+    agent_ids = np.arange(len(team_potentials))
+    phi_s1 = team_potentials[agent_ids, prev_states]
+    phi_s2 = discount*team_potentials[agent_ids, current_states]
+    delta_potential = phi_s2 - phi_s1
+
+    return delta_potential
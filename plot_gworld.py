@@ -1,4 +1,6 @@
 from gridworld import GridWorld
+from global_functions import import_snapshots
+import numpy as np
 import matplotlib.pyplot as plt
 
 
@@ -26,4 +28,69 @@ def create_plot_gridworld(n_agents, n_targets, width, height):
     plt.show()
 
 
+def replay_policies(gw, policies, n_steps):
+    """
+    Roll out saved (n_agents, n_states) greedy policies without a trained team. Returns the global reward and the
+    (n_steps+1, n_agents, 2) positions of the agents
+    """
+    agent_ids = np.arange(len(policies))
+    trajectories = np.zeros((n_steps+1, len(policies), 2), dtype=int)
 
+    gw.reset_agents()
+    states = gw.get_team_states()
+    trajectories[0] = gw.state_coords[states]
+    for t in range(n_steps):
+        step_rewards, states = gw.step_states(states, policies[agent_ids, states])
+        trajectories[t+1] = gw.state_coords[states]
+    gw.move_team_states(states)
+
+    return gw.calculate_g_reward(), trajectories
+
+
+def load_snapshot_world(file_name, output_dir, config_dir):
+    """
+    Memory-map the snapshots of a result and load the world configuration they were trained on. The world only
+    replays the snapshots, so its team is created with sparse Q-Tables that allocate no rows
+    """
+    q_tables, policies, metadata = import_snapshots(output_dir, file_name)
+    gw = GridWorld(metadata["width"], metadata["height"], sparse_q=True)
+    gw.load_configuration(metadata["n_agents"], metadata["n_targets"], config_dir)
+
+    return gw, q_tables, policies, metadata
+
+
+def plot_value_map(file_name, sr=0, agent=0, output_dir='Output_Data', config_dir='World_Config'):
+    """
+    Plot the max q-value of every cell for one agent of one stat run (only that agent's Q-Table is read from disk)
+    """
+    gw, q_tables, policies, metadata = load_snapshot_world(file_name, output_dir, config_dir)
+    values = np.max(q_tables[sr, agent], axis=1)
+    x_grid, y_grid = np.meshgrid(np.arange(gw.width), np.arange(gw.height))
+    value_map = values[x_grid + gw.width * y_grid]  # Rows are y, columns are x
+
+    plt.imshow(value_map, origin='lower', cmap='viridis')
+    plt.colorbar(label="Max Q-Value")
+    target_locs = np.array(gw.targets).reshape(-1, 2)
+    plt.scatter(target_locs[:, 0], target_locs[:, 1], marker='x', color='red')
+    plt.scatter(*gw.agents[f'A{agent}'].initial_position, marker='o', color='white')
+    plt.title(f'{file_name}: Agent {agent}, Stat Run {sr}')
+    plt.show()
+
+
+def plot_policy_replay(file_name, sr=0, output_dir='Output_Data', config_dir='World_Config'):
+    """
+    Replay the saved greedy policies of a stat run and plot the path of every agent
+    """
+    gw, q_tables, policies, metadata = load_snapshot_world(file_name, output_dir, config_dir)
+    g_reward, trajectories = replay_policies(gw, policies[sr], metadata["n_steps"])
+
+    target_locs = np.array(gw.targets).reshape(-1, 2)
+    plt.scatter(target_locs[:, 0], target_locs[:, 1])
+    for ag in range(trajectories.shape[1]):
+        plt.plot(trajectories[:, ag, 0], trajectories[:, ag, 1], alpha=0.6)
+    plt.scatter(trajectories[-1, :, 0], trajectories[-1, :, 1], marker='s')
+    plt.xlim([0, gw.width-1])
+    plt.ylim([0, gw.height-1])
+    plt.legend(["Targets"])
+    plt.title(f'{file_name}: Stat Run {sr}, Global Reward {g_reward:.1f}')
+    plt.show()
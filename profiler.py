@@ -0,0 +1,107 @@
+import json
+import os
+import time
+
+
+def get_profile_names(output_dir, file_name, stat_runs):
+    """
+    Profile report of each stat run of a result (the live metrics of a stat run are written next to its report)
+    """
+    return [os.path.join(output_dir, 'Profiles', f'{file_name}_SR{sr}.json') for sr in range(stat_runs)]
+
+
+class PhaseProfiler:
+    def __init__(self, report_name, metrics_every=5.0, **info):
+        """
+        Collect wall time and call counts of the phases of a training loop. Each call to lap charges the time since
+        the previous lap to a phase. A JSON line with the progress so far is appended to the live metrics file
+        (report_name with a .metrics.jsonl extension) at most every metrics_every seconds, and the full report is
+        saved to report_name by save_report. Info is recorded with the report
+        """
+        self.report_name = report_name
+        self.metrics_name = os.path.splitext(report_name)[0] + '.metrics.jsonl'
+        self.metrics_every = metrics_every
+        self.info = info
+        self.phase_times = {}  # Total seconds spent in each phase
+        self.phase_calls = {}  # Number of times each phase ran
+        self.n_steps = 0  # Training steps (one step of the whole team)
+        self.n_epochs = 0
+        self.last_epoch = None
+        self.last_g_reward = None
+
+        if not os.path.exists(os.path.dirname(report_name)):  # If profile directory does not exist, create it
+            os.makedirs(os.path.dirname(report_name), exist_ok=True)
+        open(self.metrics_name, 'w').close()
+
+        self.start_time = time.perf_counter()
+        self.last_lap = self.start_time
+        self.last_metrics = self.start_time
+
+    def start_lap(self):
+        """
+        Start timing the next phase (time since the previous lap is not charged to any phase)
+        """
+        self.last_lap = time.perf_counter()
+
+    def lap(self, phase):
+        """
+        Charge the time since the previous lap to a phase
+        """
+        now = time.perf_counter()
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + (now - self.last_lap)
+        self.phase_calls[phase] = self.phase_calls.get(phase, 0) + 1
+        self.last_lap = now
+
+    def end_epoch(self, ep, n_steps, g_reward=None):
+        """
+        Count the steps of a finished epoch and append to the live metrics file if it is due
+        """
+        self.n_steps += n_steps
+        self.n_epochs += 1
+        self.last_epoch = ep
+        self.last_g_reward = None if g_reward is None else float(g_reward)
+        now = time.perf_counter()
+        if now - self.last_metrics >= self.metrics_every:
+            self.write_metrics(now)
+
+    def write_metrics(self, now):
+        """
+        Append the progress so far as one JSON line
+        """
+        elapsed = now - self.start_time
+        metrics = {"epoch": self.last_epoch, "elapsed": elapsed, "steps": self.n_steps,
+                   "steps_per_sec": self.n_steps/elapsed if elapsed > 0 else 0.0, "g_reward": self.last_g_reward,
+                   "phase_times": self.phase_times}
+        with open(self.metrics_name, 'a') as metrics_file:
+            metrics_file.write(json.dumps(metrics) + '\n')
+        self.last_metrics = now
+
+    def get_report(self):
+        """
+        Wall time, call count, mean time per call and share of the total time of every phase, with overall steps/sec
+        """
+        total_time = time.perf_counter() - self.start_time
+        phases = {}
+        for phase, phase_time in self.phase_times.items():
+            calls = self.phase_calls[phase]
+            phases[phase] = {"time": phase_time, "calls": calls, "mean_us": 1e6*phase_time/calls,
+                             "fraction": phase_time/total_time if total_time > 0 else 0.0}
+
+        report = {"total_time": total_time, "epochs": self.n_epochs, "steps": self.n_steps,
+                  "steps_per_sec": self.n_steps/total_time if total_time > 0 else 0.0, "phases": phases}
+        report.update(self.info)
+
+        return report
+
+    def save_report(self):
+        """
+        Write the report atomically and add a final line to the live metrics file
+        """
+        report = self.get_report()
+        tmp_name = self.report_name + '.tmp'
+        with open(tmp_name, 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+        os.replace(tmp_name, self.report_name)
+        self.write_metrics(time.perf_counter())
+
+        return report
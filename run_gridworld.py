@@ -1 +1,676 @@
-from gridworld import GridWorldfrom difference_reward import calc_difference_rewardfrom cfl import calc_cfl_difference, create_counterfactualsfrom pbrs import PBRSimport numpy as npfrom global_functions import create_pickle_file, create_csv_filefrom tqdm import tqdmdef manual_gridworld():    """    This is a manually written gridworld solver to test environmental mechanics (for a single agent gridworld)    """    width = 5    height = 5    n_agents = 1    n_targets = 1    gw = GridWorld(width, height)    gw.create_world(n_agents, n_targets)    # Testing environment mechanics with manual strategy    x_dist = gw.targets[0][0] - gw.agents['A0'].loc[0]    y_dist = gw.targets[0][1] - gw.agents['A0'].loc[1]    solution = []    while y_dist != 0:        if y_dist > 0:            action = 0            solution.append(action)            reward, gw.agents['A0'].loc = gw.step(gw.agents['A0'].loc, action)        else:            action = 1            solution.append(action)            reward, gw.agents['A0'].loc = gw.step(gw.agents['A0'].loc, action)        y_dist = gw.targets[0][1] - gw.agents['A0'].loc[1]    while x_dist != 0:        if x_dist < 0:            action = 2            solution.append(action)            reward, gw.agents['A0'].loc = gw.step(gw.agents['A0'].loc, action)        else:            action = 3            solution.append(action)            reward, gw.agents['A0'].loc = gw.step(gw.agents['A0'].loc, action)        x_dist = gw.targets[0][0] - gw.agents['A0'].loc[0]    return solutiondef q_learning_gridworld(gw, n_agents, stat_runs, n_epochs, n_steps):    """    Use a standard q-learning approach to solve a multiagent gridworld    """    q_learning_curve = np.zeros((n_agents, stat_runs, n_epochs))    g_learning_curve = np.zeros((stat_runs, n_epochs))    for sr in tqdm(range(0, stat_runs)):        # Zero out the Q-Table of the agent for the new stat run        for ag in gw.agents:            gw.agents[ag].reset_learner()        best_solution = [[] for ag in range(n_agents)]        for ep in range(n_epochs):            # Reset agent to initial conditions (does not erase Q-Table)            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            # Take actions over n timesteps            for t in range(n_steps):                for ag in gw.agents:                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_egreedy_action(agent_state)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)                    next_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].update_state(next_state)                    # Update Q-Table                    gw.agents[ag].update_q_val(l_reward)            # Test agent's best solution thus far            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            for t in range(n_steps):                for id, ag in enumerate(gw.agents):                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_greedy_action(agent_state)                    if ep % (n_epochs-1) == 0:                        best_solution[id].append(gw.agents[ag].action)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)                    q_learning_curve[id, sr, ep] += l_reward            g_reward = gw.calculate_g_reward()            g_learning_curve[sr, ep] = g_reward        create_csv_file(best_solution, "Output_Data/", "QLearningAgentSolutions.csv")    create_pickle_file(q_learning_curve, "Output_Data/", "QLearningReward")    create_pickle_file(g_learning_curve, "Output_Data/", "QLearning_GReward")def gridworld_global(gw, n_agents, stat_runs, n_epochs, n_steps):    """    Train multiagent team on Gridworld using global reward as feedback    """    agent_learning_curves = np.zeros((stat_runs, n_epochs))    for sr in tqdm(range(0, stat_runs)):        best_solution = [[] for ag in range(n_agents)]        # Zero out the Q-Table of the agent for the new stat run        for ag in gw.agents:            gw.agents[ag].reset_learner()        for ep in range(n_epochs):            # Reset agent to initial conditions (does not erase Q-Table)            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            # Agents choose actions for pre-determined number of time steps            for t in range(n_steps):                for ag in gw.agents:                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_egreedy_action(agent_state)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)                    next_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].update_state(next_state)                g_reward = gw.calculate_g_reward()                # Update Agent Q-Tables                for ag in gw.agents:                    gw.agents[ag].update_q_val(g_reward)            # Test agent solution            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            for t in range(n_steps):                for id, ag in enumerate(gw.agents):                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_greedy_action(agent_state)                    if ep % (n_epochs-1) == 0:                        best_solution[id].append(gw.agents[ag].action)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)            g_reward = gw.calculate_g_reward()            agent_learning_curves[sr, ep] = g_reward    create_pickle_file(agent_learning_curves, "Output_Data/", "Global_Rewards")def gridworld_difference(gw, n_agents, stat_runs, n_epochs, n_steps):    """    Train multiagent team on Gridworld using difference reward as feedback    """    agent_learning_curves = np.zeros((stat_runs, n_epochs))    for sr in tqdm(range(0, stat_runs)):        best_solution = [[] for ag in range(n_agents)]        # Zero out the Q-Table of the agent for the new stat run        for ag in gw.agents:            gw.agents[ag].reset_learner()        for ep in range(n_epochs):            # Reset agent to initial conditions (does not erase Q-Table)            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            # Agents choose actions for pre-determined number of time steps            for t in range(n_steps):                for ag in gw.agents:                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_egreedy_action(agent_state)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)                    next_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].update_state(next_state)                g_reward = gw.calculate_g_reward()                d_reward = calc_difference_reward(g_reward, gw)                # Update Agent Q-Tables                for id, ag in enumerate(gw.agents):                    gw.agents[ag].update_q_val(d_reward[id])            # Test agent solution            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            for t in range(n_steps):                for id, ag in enumerate(gw.agents):                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_greedy_action(agent_state)                    if ep % (n_epochs-1) == 0:                        best_solution[id].append(gw.agents[ag].action)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)            g_reward = gw.calculate_g_reward()            agent_learning_curves[sr, ep] = g_reward    create_pickle_file(agent_learning_curves, "Output_Data/", "Difference_Rewards")def gridworld_pbrs(gw, n_agents, stat_runs, n_epochs, n_steps, ptype):    """    Train multiagent team on Gridworld using potential-based reward shaping    """    agent_learning_curves = np.zeros((stat_runs, n_epochs))    agent_pbrs = {f'P{ag}': PBRS(gw.n_states) for ag in range(n_agents)}    for id, ag in enumerate(agent_pbrs):        agent_pbrs[ag].set_potentials(gw, id, n_steps, ptype)    for sr in tqdm(range(0, stat_runs)):        best_solution = [[] for ag in range(n_agents)]        # Zero out the Q-Table of the agent for the new stat run        for ag in range(n_agents):            gw.agents[f'A{ag}'].reset_learner()        for ep in range(n_epochs):            # Reset agents to initial conditions            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            # Agents choose actions for pre-determined number of time steps            for t in range(n_steps):                for ag in gw.agents:                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_egreedy_action(agent_state)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)                    next_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].update_state(next_state)                # Calculate agent rewards                g_reward = gw.calculate_g_reward()                for id, ag in enumerate(gw.agents):                    # Calculate change in potential                    ag_current_state = gw.agents[ag].current_state  # Current agent state                    ag_prev_state = gw.agents[ag].prev_state  # Previous agent state                    delta_phi = agent_pbrs[f'P{id}'].potential_function(ag_current_state, ag_prev_state)                    # Update Q-table and state potentials                    gw.agents[ag].update_q_val(g_reward + delta_phi)            # Test agent solution            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            for t in range(n_steps):                for id, ag in enumerate(gw.agents):                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_greedy_action(agent_state)                    if ep % (n_epochs-1) == 0:                        best_solution[id].append(gw.agents[ag].action)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)            g_reward = gw.calculate_g_reward()            agent_learning_curves[sr, ep] = g_reward    create_pickle_file(agent_learning_curves, "Output_Data/", "PBRS_Rewards")def gridworld_cfl(gw, n_agents, stat_runs, n_epochs, n_steps, counterfactuals):    """    Train multiagent team on Gridworld using CFL difference rewards as feedback    """    agent_learning_curves = np.zeros((stat_runs, n_epochs))    for sr in tqdm(range(0, stat_runs)):        best_solution = [[] for ag in range(n_agents)]        # Zero out the Q-Table of the agent for the new stat run        for ag in gw.agents:            gw.agents[ag].reset_learner()        for ep in range(n_epochs):            # Reset agent to initial conditions (does not erase Q-Table)            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            # Agents choose actions for pre-determined number of time steps            for t in range(n_steps):                for ag in gw.agents:                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_egreedy_action(agent_state)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)                    next_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].update_state(next_state)                g_reward = gw.calculate_g_reward()                d_reward = calc_cfl_difference(g_reward, gw, counterfactuals)                # Update Agent Q-Tables                for id, ag in enumerate(gw.agents):                    gw.agents[ag].update_q_val(d_reward[id])            # Test agent solution            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            for t in range(n_steps):                for id, ag in enumerate(gw.agents):                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_greedy_action(agent_state)                    if ep % (n_epochs - 1) == 0:                        best_solution[id].append(gw.agents[ag].action)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)            g_reward = gw.calculate_g_reward()            agent_learning_curves[sr, ep] = g_reward    create_pickle_file(agent_learning_curves, "Output_Data/", "CFL_Rewards")def gridworld_drip(gw, n_agents, stat_runs, n_epochs, n_steps, ptype):    """    Train multiagent team on Gridworld using difference reward + PBRS as feedback    """    agent_learning_curves = np.zeros((stat_runs, n_epochs))    agent_pbrs = {f'P{ag}': PBRS(gw.n_states) for ag in range(n_agents)}    for id, ag in enumerate(agent_pbrs):        agent_pbrs[ag].set_potentials(gw, id, n_steps, ptype)    for sr in tqdm(range(0, stat_runs)):        best_solution = [[] for ag in range(n_agents)]        # Zero out the Q-Table of the agent for the new stat run        for ag in gw.agents:            gw.agents[ag].reset_learner()        for ep in range(n_epochs):            # Reset agent to initial conditions (does not erase Q-Table)            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            # Agents choose actions for pre-determined number of time steps            for t in range(n_steps):                for ag in gw.agents:                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_egreedy_action(agent_state)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)                    next_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].update_state(next_state)                g_reward = gw.calculate_g_reward()                d_reward = calc_difference_reward(g_reward, gw)                # Update Agent Q-Tables                for id, ag in enumerate(gw.agents):                    ag_current_state = gw.agents[ag].current_state  # Current agent state                    ag_prev_state = gw.agents[ag].prev_state  # Previous agent state                    delta_phi = agent_pbrs[f'P{id}'].potential_function(ag_current_state, ag_prev_state)                    gw.agents[ag].update_q_val(d_reward[id] + delta_phi)            # Test agent solution            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            for t in range(n_steps):                for id, ag in enumerate(gw.agents):                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_greedy_action(agent_state)                    if ep % (n_epochs - 1) == 0:                        best_solution[id].append(gw.agents[ag].action)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)            g_reward = gw.calculate_g_reward()            agent_learning_curves[sr, ep] = g_reward    create_pickle_file(agent_learning_curves, "Output_Data/", "DRIP_Rewards")def gridworld_cflp(gw, n_agents, stat_runs, n_epochs, n_steps, counterfactuals, ptype):    """    Train multiagent team on Gridworld using CFL + PBRS rewards as feedback    """    agent_learning_curves = np.zeros((stat_runs, n_epochs))    agent_pbrs = {f'P{ag}': PBRS(gw.n_states) for ag in range(n_agents)}    for id, ag in enumerate(agent_pbrs):        agent_pbrs[ag].set_potentials(gw, id, n_steps, ptype)    for sr in tqdm(range(0, stat_runs)):        best_solution = [[] for ag in range(n_agents)]        # Zero out the Q-Table of the agent for the new stat run        for ag in gw.agents:            gw.agents[ag].reset_learner()        for ep in range(n_epochs):            # Reset agent to initial conditions (does not erase Q-Table)            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            # Agents choose actions for pre-determined number of time steps            for t in range(n_steps):                for ag in gw.agents:                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_egreedy_action(agent_state)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)                    next_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].update_state(next_state)                g_reward = gw.calculate_g_reward()                d_reward = calc_cfl_difference(g_reward, gw, counterfactuals)                # Update Agent Q-Tables                for id, ag in enumerate(gw.agents):                    ag_current_state = gw.agents[ag].current_state  # Current agent state                    ag_prev_state = gw.agents[ag].prev_state  # Previous agent state                    delta_phi = agent_pbrs[f'P{id}'].potential_function(ag_current_state, ag_prev_state)                    gw.agents[ag].update_q_val(d_reward[id] + delta_phi)            # Test agent solution            for ag in gw.agents:                gw.agents[ag].reset_agent()                agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                gw.agents[ag].set_current_state(agent_state)            for t in range(n_steps):                for id, ag in enumerate(gw.agents):                    agent_state = gw.agents[ag].loc[0] + gw.height * gw.agents[ag].loc[1]                    gw.agents[ag].action = gw.agents[ag].get_greedy_action(agent_state)                    if ep % (n_epochs - 1) == 0:                        best_solution[id].append(gw.agents[ag].action)                    l_reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, gw.agents[ag].action)            g_reward = gw.calculate_g_reward()            agent_learning_curves[sr, ep] = g_reward    create_pickle_file(agent_learning_curves, "Output_Data/", "CFLP_Rewards")if __name__ == "__main__":    width = 20    height = 20    n_agents = 20    n_targets = n_agents    stat_runs = 30    n_epochs = 5000    n_steps = 30    gw = GridWorld(width, height)    gw.load_configuration(n_agents, n_targets)  # Load GridWorld configuration from CSV files    print("Running Gridworld with Q-Learning Local Reward")    q_learning_gridworld(gw, n_agents, stat_runs, n_epochs, n_steps)    print('\n')    print("Running Gridworld with Global Reward")    gridworld_global(gw, n_agents, stat_runs, n_epochs, n_steps)    print('\n')    print("Running Gridworld with Difference Reward")    gridworld_difference(gw, n_agents, stat_runs, n_epochs, n_steps)    print('\n')    print("Running Gridworld with PBRS")    ptype = "custom"  # exploration, target_prox, target_agent, or custom    gridworld_pbrs(gw, n_agents, stat_runs, n_epochs, n_steps, ptype)    print('\n')    print("Running Gridworld with CFL")    ctype = "split"  # distance, split, assign, or value    counterfactuals = create_counterfactuals(gw, ctype, 4)    gridworld_cfl(gw, n_agents, stat_runs, n_epochs, n_steps, counterfactuals)    print('\n')    print("Running Gridworld with DRiP")    ptype = "exploration"  # exploration, target_prox, target_agent, or custom    gridworld_drip(gw, n_agents, stat_runs, n_epochs, n_steps, ptype)    print('\n')    print("Running Gridworld with CFL-P")    ptype = "exploration"  # exploration, target_prox, target_agent, or custom    ctype = "split"  # distance, split, assign, or value    counterfactuals = create_counterfactuals(gw, ctype, 5)    gridworld_cflp(gw, n_agents, stat_runs, n_epochs, n_steps, counterfactuals, ptype)    print('\n')
\ No newline at end of file
+from gridworld import GridWorld
+from agent import BatchQLearner
+from difference_reward import calc_difference_reward, calc_batch_difference_reward
+from cfl import calc_cfl_difference, calc_batch_cfl_difference
+from pbrs import team_potential_function
+from world_cache import cached_team_potentials, cached_counterfactuals
+from episode_kernel import train_stat_run_kernel, select_backend
+import numpy as np
+import random
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from global_functions import StreamingArrayFile, BufferedCSVWriter, load_sidecar, truncate_csv_rows
+from checkpoint import get_checkpoint_names, remove_checkpoints, save_checkpoint, load_checkpoint
+from profiler import PhaseProfiler, get_profile_names
+from exploration import ExplorationStreams
+from tqdm import tqdm
+
+
+def manual_gridworld():
+    """
+    This is a manually written gridworld solver to test environmental mechanics (for a single agent gridworld)
+    """
+    width = 5
+    height = 5
+    n_agents = 1
+    n_targets = 1
+
+    gw = GridWorld(width, height)
+    gw.create_world(n_agents, n_targets)
+
+    # Testing environment mechanics with manual strategy
+    x_dist = gw.targets[0][0] - gw.agents['A0'].loc[0]
+    y_dist = gw.targets[0][1] - gw.agents['A0'].loc[1]
+
+    solution = []
+    while y_dist != 0:
+        if y_dist > 0:
+            action = 0
+            solution.append(action)
+            reward, gw.agents['A0'].loc = gw.step(gw.agents['A0'].loc, action)
+        else:
+            action = 1
+            solution.append(action)
+            reward, gw.agents['A0'].loc = gw.step(gw.agents['A0'].loc, action)
+        y_dist = gw.targets[0][1] - gw.agents['A0'].loc[1]
+
+    while x_dist != 0:
+        if x_dist < 0:
+            action = 2
+            solution.append(action)
+            reward, gw.agents['A0'].loc = gw.step(gw.agents['A0'].loc, action)
+        else:
+            action = 3
+            solution.append(action)
+            reward, gw.agents['A0'].loc = gw.step(gw.agents['A0'].loc, action)
+        x_dist = gw.targets[0][0] - gw.agents['A0'].loc[0]
+
+    return solution
+
+
+def train_stat_run(gw, n_epochs, n_steps, reward_type, counterfactuals=None, team_potentials=None, backend="numpy",
+                   eval_every=1, checkpoint_every=0, checkpoint_name=None, profiler=None, seed=None):
+    """
+    Train the team of agents for a single stat run. Reward type is local, global, difference, or cfl and team
+    potentials (if provided) add PBRS shaping to the reward. Exploration is drawn from per-agent random streams
+    created from seed (see exploration.ExplorationStreams). Backend "jit" runs each epoch in the compiled episode
+    kernel instead. The greedy solution is tested every eval_every epochs (and on the last epoch), epochs in between
+    carry the last result forward. Training state is saved to checkpoint_name every checkpoint_every epochs, and
+    training continues from the checkpoint if it exists. Returns the global reward learning curve, the local reward
+    learning curve of each agent, the greedy solution of each agent, and a mask of the epochs that were evaluated. If a
+    profiler is given, the time spent in each phase of training is charged to it
+    """
+    if backend == "jit":
+        return train_stat_run_kernel(gw, n_epochs, n_steps, reward_type, counterfactuals, team_potentials, eval_every,
+                                     checkpoint_every, checkpoint_name, profiler, seed)
+
+    team = gw.team_learner
+    g_learning_curve = np.zeros(n_epochs)
+    l_learning_curve = np.zeros((team.n_agents, n_epochs))
+    best_solution = [[] for ag in range(team.n_agents)]
+    evaluated = np.zeros(n_epochs, dtype=bool)
+    rollout = None  # Last greedy rollout (global reward, local rewards, states and actions)
+    exploration = ExplorationStreams(seed, team.n_agents, n_steps, team.n_actions)
+
+    # Zero out the Q-Tables of the team for the new stat run, or continue from a checkpoint
+    team.reset_learner()
+    start_ep = 0
+    if checkpoint_name is not None and os.path.exists(checkpoint_name):
+        start_ep, g_learning_curve, l_learning_curve, best_solution, evaluated, rollout = \
+            load_checkpoint(checkpoint_name, team, team_potentials)
+        exploration.seek(start_ep)
+    profile = profiler is not None
+    for ep in range(start_ep, n_epochs):
+        if profile:
+            profiler.start_lap()
+        explore_draws, random_actions = exploration.draw_epoch()
+        if profile:
+            profiler.lap("exploration_draws")
+
+        # Reset agents to initial conditions (does not erase Q-Table)
+        gw.reset_agents()
+        team.set_current_states(gw.get_team_states())
+        if profile:
+            profiler.lap("reset")
+
+        # Agents choose actions for pre-determined number of time steps
+        for t in range(n_steps):
+            team.actions = team.get_egreedy_actions(team.current_states, explore_draws[t], random_actions[t])
+            if profile:
+                profiler.lap("action_selection")
+            l_rewards, states = gw.step_states(team.current_states, team.actions)
+            gw.move_team_states(states)
+            team.update_states(states)
+            if profile:
+                profiler.lap("step")
+
+            # Calculate agent rewards
+            if reward_type == "local":
+                rewards = l_rewards
+            else:
+                g_reward = gw.calculate_g_reward()
+                if profile:
+                    profiler.lap("g_reward")
+                if reward_type == "difference":
+                    rewards = calc_difference_reward(g_reward, gw)
+                elif reward_type == "cfl":
+                    rewards = calc_cfl_difference(g_reward, gw, counterfactuals)
+                else:
+                    rewards = g_reward
+            if team_potentials is not None:
+                if profile:
+                    profiler.lap(f"{reward_type}_reward")
+                rewards = rewards + team_potential_function(team_potentials, team.current_states, team.prev_states)
+                if profile:
+                    profiler.lap("pbrs_potential")
+            elif profile:
+                profiler.lap(f"{reward_type}_reward")
+
+            # Update Agent Q-Tables
+            team.update_q_vals(rewards)
+            if profile:
+                profiler.lap("q_update")
+
+        # Test agent solution on evaluation epochs, reusing the last rollout if its greedy path has not changed
+        if ep % eval_every == 0 or ep == n_epochs-1:
+            if rollout is None or not greedy_path_unchanged(team, rollout):
+                rollout = test_team(gw, team, n_steps)
+            evaluated[ep] = True
+        g_reward, l_rewards, states, actions = rollout
+        if ep % (n_epochs-1) == 0:
+            for id in range(team.n_agents):
+                best_solution[id].extend(actions[:, id].tolist())
+        g_learning_curve[ep] = g_reward
+        l_learning_curve[:, ep] = l_rewards
+        if profile:
+            profiler.lap("evaluation")
+
+        if checkpoint_name is not None and checkpoint_every > 0 and (ep+1) % checkpoint_every == 0:
+            save_checkpoint(checkpoint_name, team, team_potentials, ep, g_learning_curve, l_learning_curve,
+                            best_solution, evaluated, rollout)
+            if profile:
+                profiler.lap("checkpoint")
+        if profile:
+            profiler.end_epoch(ep, n_steps, g_reward)
+
+    return g_learning_curve, l_learning_curve, best_solution, evaluated
+
+
+def test_team(gw, team, n_steps):
+    """
+    Roll out the greedy policy of the team. Returns the global reward, the summed local reward of each agent, and the
+    (n_steps, n_agents) states visited and actions taken
+    """
+    states = np.zeros((n_steps, team.n_agents), dtype=int)
+    actions = np.zeros((n_steps, team.n_agents), dtype=int)
+    l_rewards = np.zeros(team.n_agents)
+
+    gw.reset_agents()
+    team_states = gw.get_team_states()
+    for t in range(n_steps):
+        states[t] = team_states
+        actions[t] = team.get_greedy_actions(team_states)
+        step_rewards, team_states = gw.step_states(team_states, actions[t])
+        l_rewards += step_rewards
+    gw.move_team_states(team_states)
+
+    return gw.calculate_g_reward(), l_rewards, states, actions
+
+
+def greedy_path_unchanged(team, rollout):
+    """
+    Check if the greedy action of every state visited by a previous rollout is the same, in which case the greedy
+    rollout (which is deterministic) would follow the same path and its results can be reused
+    """
+    g_reward, l_rewards, states, actions = rollout
+
+    return np.array_equal(team.get_greedy_actions(states), actions)
+
+
+def train_batched_stat_runs(gw, n_batch, n_epochs, n_steps, reward_type, counterfactuals=None, team_potentials=None,
+                            alphas=0.1, epsilons=0.15, discounts=0.9, eval_every=1, seeds=None):
+    """
+    Train n_batch independent copies of the team as one batched simulation, so each timestep is a handful of array
+    operations for the whole batch. Alphas, epsilons and discounts give the hyperparameters of each batch (or one value
+    shared by all batches). Each batch explores with its own random streams seeded with its entry in seeds, the same
+    streams train_stat_run uses for that seed. Solutions are tested every eval_every epochs, epochs in between carry
+    the last result forward. Returns the (n_batch, n_epochs) global reward learning curves and a mask of the epochs
+    that were evaluated
+    """
+    n_agents = len(gw.agents)
+    learner = BatchQLearner(n_batch, n_agents, gw.n_states, dtype=gw.q_dtype)
+    learner.set_hyperparameters(np.broadcast_to(alphas, n_batch), np.broadcast_to(epsilons, n_batch),
+                                np.broadcast_to(discounts, n_batch))
+    if seeds is None:
+        seeds = [None]*n_batch
+    explorations = [ExplorationStreams(batch_seed, n_agents, n_steps, learner.n_actions) for batch_seed in seeds]
+    initial_states = gw.get_states([gw.agents[ag].initial_position for ag in gw.agents])
+    g_learning_curves = np.zeros((n_batch, n_epochs))
+    evaluated = np.zeros(n_epochs, dtype=bool)
+
+    for ep in range(n_epochs):
+        # Exploration of every batch for this epoch, (n_steps, n_batch, n_agents)
+        draws = [exploration.draw_epoch() for exploration in explorations]
+        explore_draws = np.stack([batch_draws[0] for batch_draws in draws], axis=1)
+        random_actions = np.stack([batch_draws[1] for batch_draws in draws], axis=1)
+
+        # Reset agents in every batch to initial conditions (does not erase Q-Tables)
+        learner.set_current_states(np.broadcast_to(initial_states, (n_batch, n_agents)).copy())
+
+        # Agents choose actions for pre-determined number of time steps
+        for t in range(n_steps):
+            learner.actions = learner.get_egreedy_actions(learner.current_states, explore_draws[t], random_actions[t])
+            l_rewards, states = gw.step_states(learner.current_states, learner.actions)
+            learner.update_states(states)
+
+            # Calculate agent rewards
+            if reward_type == "local":
+                rewards = l_rewards
+            else:
+                agent_targets, target_occupancy = gw.get_batch_occupancy(states)
+                g_rewards = gw.calculate_batch_g_reward(target_occupancy)
+                if reward_type == "difference":
+                    rewards = calc_batch_difference_reward(g_rewards, gw, agent_targets, target_occupancy)
+                elif reward_type == "cfl":
+                    rewards = calc_batch_cfl_difference(g_rewards, gw, counterfactuals, agent_targets, target_occupancy)
+                else:
+                    rewards = g_rewards[:, None]
+            if team_potentials is not None:
+                rewards = rewards + team_potential_function(team_potentials, learner.current_states,
+                                                            learner.prev_states)
+
+            # Update Agent Q-Tables
+            learner.update_q_vals(rewards)
+
+        # Test agent solutions on evaluation epochs
+        if ep % eval_every != 0 and ep != n_epochs-1:
+            g_learning_curves[:, ep] = g_learning_curves[:, ep-1]
+            continue
+        states = np.broadcast_to(initial_states, (n_batch, n_agents))
+        for t in range(n_steps):
+            l_rewards, states = gw.step_states(states, learner.get_greedy_actions(states))
+        agent_targets, target_occupancy = gw.get_batch_occupancy(states)
+        g_learning_curves[:, ep] = gw.calculate_batch_g_reward(target_occupancy)
+        evaluated[ep] = True
+
+    return g_learning_curves, evaluated
+
+
+def seeded_stat_run(gw, run_seed, *train_args, checkpoint_name=None, snapshot=False, profile_name=None):
+    """
+    Seed the random number generators and train the team for a single stat run (a checkpoint, if it exists, restores
+    the random number generator states it was saved with). The results of train_stat_run are followed by a snapshot
+    of the final Q-Tables and greedy policies of the team, or None if snapshot is not set. With a profile_name, the
+    time spent in each phase of training is saved to it as a JSON report
+    """
+    random.seed(run_seed)
+    np.random.seed(run_seed)
+
+    profiler = None
+    if profile_name is not None:
+        profiler = PhaseProfiler(profile_name, seed=run_seed)
+    results = train_stat_run(gw, *train_args, checkpoint_name=checkpoint_name, profiler=profiler, seed=run_seed)
+    if profiler is not None:
+        profiler.save_report()
+    team_snapshot = None
+    if snapshot:
+        team_snapshot = (gw.team_learner.get_dense_q_tables(), gw.team_learner.get_policies())
+
+    return results + (team_snapshot,)
+
+
+_worker_world = {}  # Read-only world data shared with the stat runs of a worker process
+
+
+def init_stat_run_worker(gw, train_args):
+    """
+    Store the world and training arguments once per worker process instead of pickling them for every stat run
+    """
+    _worker_world['gw'] = gw
+    _worker_world['train_args'] = train_args
+
+
+def worker_stat_run(run):
+    """
+    Train a single stat run in a worker process using the world shared by init_stat_run_worker
+    """
+    run_seed, checkpoint_name, snapshot, profile_name = run
+    return seeded_stat_run(_worker_world['gw'], run_seed, *_worker_world['train_args'], checkpoint_name=checkpoint_name,
+                           snapshot=snapshot, profile_name=profile_name)
+
+
+def run_stat_runs(gw, stat_runs, workers, seed, *train_args, completed_runs=(), checkpoint_names=None,
+                  snapshots=False, profile_names=None):
+    """
+    Train independent stat runs one after another or spread over a pool of worker processes, yielding the stat run
+    and its results in order as soon as they are available. Every stat run is seeded with seed + sr, so results do not
+    depend on the number of workers. Stat runs in completed_runs are skipped. With snapshots, the results of each stat
+    run include its final Q-Tables and greedy policies (see seeded_stat_run). Each stat run with an entry in
+    profile_names saves a profile of its training there
+    """
+    if seed is None:
+        seed = random.randrange(2**31)
+    runs = [sr for sr in range(stat_runs) if sr not in completed_runs]
+    run_args = [(seed + sr, None if checkpoint_names is None else checkpoint_names[sr], snapshots,
+                 None if profile_names is None else profile_names[sr]) for sr in runs]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_stat_run_worker,
+                                 initargs=(gw, train_args)) as pool:
+            yield from zip(runs, tqdm(pool.map(worker_stat_run, run_args), total=len(runs)))
+    else:
+        for sr, (run_seed, checkpoint_name, snapshot, profile_name) in zip(runs, tqdm(run_args)):
+            yield sr, seeded_stat_run(gw, run_seed, *train_args, checkpoint_name=checkpoint_name, snapshot=snapshot,
+                                      profile_name=profile_name)
+
+
+def get_base_seed(seed, output_dir, file_name, resume):
+    """
+    Base seed of the stat runs. When resuming without a seed, the seed recorded with the existing results is used so
+    the resumed stat runs match an uninterrupted run
+    """
+    if seed is None and resume:
+        sidecar = load_sidecar(output_dir, file_name)
+        if sidecar is not None:
+            return sidecar["metadata"]["seed"]
+    if seed is None:
+        seed = random.randrange(2**31)
+
+    return seed
+
+
+def curve_metadata(gw, reward_type, stat_runs, n_epochs, n_steps, seed, backend, eval_every, **params):
+    """
+    Metadata recorded in the JSON sidecar of a learning curve file. Epochs that were not evaluated (see eval_every,
+    the last epoch is always evaluated) carry the last evaluated reward forward, the evaluated epochs of each stat run
+    are saved with the curves (see open_evaluated_file)
+    """
+    metadata = {"width": gw.width, "height": gw.height, "n_agents": len(gw.agents), "n_targets": len(gw.targets),
+                "reward_type": reward_type, "stat_runs": stat_runs, "n_epochs": n_epochs, "n_steps": n_steps,
+                "seed": seed, "backend": backend, "eval_every": eval_every}
+    metadata.update(params)
+
+    return metadata
+
+
+def use_snapshots(gw, save_snapshots):
+    """
+    Decide if Q-Table snapshots are saved. Snapshots are stored as dense Q-Tables, so by default (save_snapshots is
+    None) they are only saved for dense Q-Tables, and requesting them for sparse Q-Tables is an error. Trainers check
+    this first, so the error is raised before any output file is opened
+    """
+    if save_snapshots is None:
+        return not gw.sparse_q
+    if save_snapshots and gw.sparse_q:
+        raise ValueError("Snapshots store dense Q-Tables, which would undo the memory savings of sparse Q-Tables "
+                         "(set save_snapshots=False or create the GridWorld without sparse_q)")
+
+    return save_snapshots
+
+
+def open_snapshot_files(gw, stat_runs, output_dir, file_name, metadata, resume):
+    """
+    Memory-mapped stores for the final Q-Tables, (stat_runs, n_agents, n_states, n_actions), and greedy policies,
+    (stat_runs, n_agents, n_states) int8, of every stat run of a result. States are indexed x + width*y
+    """
+    team = gw.team_learner
+    q_file = StreamingArrayFile(output_dir, f'{file_name}_QTables',
+                                (stat_runs, team.n_agents, team.n_states, team.n_actions), metadata=metadata,
+                                dtype=gw.q_dtype, resume=resume)
+    policy_file = StreamingArrayFile(output_dir, f'{file_name}_Policies', (stat_runs, team.n_agents, team.n_states),
+                                     metadata=metadata, dtype=np.int8, resume=resume)
+
+    return q_file, policy_file
+
+
+def open_evaluated_file(stat_runs, output_dir, file_name, metadata, resume):
+    """
+    Memory-mapped store for the (stat_runs, n_epochs) mask of the epochs whose greedy solution was tested. Learning
+    curve entries of the other epochs carry the last tested reward forward (see eval_every)
+    """
+    return StreamingArrayFile(output_dir, f'{file_name}_Evaluated', (stat_runs, metadata["n_epochs"]),
+                              metadata=metadata, dtype=np.bool_, resume=resume)
+
+
+def save_snapshot(snapshot_files, sr, snapshot):
+    """
+    Write the Q-Tables and greedy policies of a finished stat run to the snapshot stores
+    """
+    if snapshot_files is None:
+        return
+
+    q_tables, policies = snapshot
+    q_file, policy_file = snapshot_files
+    q_file.write_run(sr, q_tables)
+    policy_file.write_run(sr, policies)
+
+
+def train_and_save_curves(gw, stat_runs, workers, seed, output_dir, file_name, metadata, resume, save_snapshots,
+                          profile, *train_args):
+    """
+    Train the stat runs and stream the global reward learning curve of each into a memory-mapped (stat_runs, n_epochs)
+    file as soon as it finishes, along with the mask of evaluated epochs and the final Q-Tables and policies of the
+    team if save_snapshots is set (see use_snapshots). With profile, every stat run saves a profile of its training to
+    the Profiles directory. With resume, completed stat runs are skipped and interrupted stat runs continue from their
+    last checkpoint
+    """
+    curve_file = StreamingArrayFile(output_dir, file_name, (stat_runs, metadata["n_epochs"]), metadata=metadata,
+                                    resume=resume)
+    evaluated_file = open_evaluated_file(stat_runs, output_dir, file_name, metadata, resume)
+    snapshot_files = None
+    if save_snapshots:
+        snapshot_files = open_snapshot_files(gw, stat_runs, output_dir, file_name, metadata, resume)
+    checkpoint_names = get_checkpoint_names(output_dir, file_name, stat_runs)
+    if not resume:
+        remove_checkpoints(checkpoint_names)
+    profile_names = get_profile_names(output_dir, file_name, stat_runs) if profile else None
+
+    # Stat runs are complete once their learning curve is written (the last file written for a stat run)
+    results = run_stat_runs(gw, stat_runs, workers, seed, *train_args, completed_runs=curve_file.completed_runs(),
+                            checkpoint_names=checkpoint_names, snapshots=save_snapshots, profile_names=profile_names)
+    for sr, (g_curve, l_curve, best_solution, evaluated, snapshot) in results:
+        save_snapshot(snapshot_files, sr, snapshot)
+        evaluated_file.write_run(sr, evaluated)
+        curve_file.write_run(sr, g_curve)
+        remove_checkpoints([checkpoint_names[sr]])
+
+
+def q_learning_gridworld(gw, n_agents, stat_runs, n_epochs, n_steps, workers=1, seed=None, output_dir="Output_Data/",
+                         backend="numpy", eval_every=1, resume=False, checkpoint_every=0, save_snapshots=None,
+                         profile=False):
+    """
+    Use a standard q-learning approach to solve a multiagent gridworld
+    """
+    save_snapshots = use_snapshots(gw, save_snapshots)
+    seed = get_base_seed(seed, output_dir, "QLearningReward", resume)
+    metadata = curve_metadata(gw, "local", stat_runs, n_epochs, n_steps, seed, backend, eval_every)
+    q_learning_curve = StreamingArrayFile(output_dir, "QLearningReward", (n_agents, stat_runs, n_epochs), run_axis=1,
+                                          metadata=metadata, resume=resume)
+    g_learning_curve = StreamingArrayFile(output_dir, "QLearning_GReward", (stat_runs, n_epochs), metadata=metadata,
+                                          resume=resume)
+    evaluated_file = open_evaluated_file(stat_runs, output_dir, "QLearning", metadata, resume)
+    snapshot_files = None
+    if save_snapshots:
+        snapshot_files = open_snapshot_files(gw, stat_runs, output_dir, "QLearning", metadata, resume)
+    checkpoint_names = get_checkpoint_names(output_dir, "QLearning", stat_runs)
+    if not resume:
+        remove_checkpoints(checkpoint_names)
+    profile_names = get_profile_names(output_dir, "QLearning", stat_runs) if profile else None
+
+    # Stat runs are complete once their local reward curves are written (the last file written for a stat run). The
+    # solutions file keeps one row per completed stat run: a fresh run (no completed stat runs) starts with an empty
+    # file, and a solution written for a stat run that was interrupted before it completed is written again
+    completed_runs = q_learning_curve.completed_runs()
+    truncate_csv_rows(os.path.join(output_dir, "QLearningAgentSolutions.csv"), len(completed_runs))
+    results = run_stat_runs(gw, stat_runs, workers, seed, n_epochs, n_steps, "local", None, None,
+                            select_backend(backend), eval_every, checkpoint_every,
+                            completed_runs=completed_runs, checkpoint_names=checkpoint_names,
+                            snapshots=save_snapshots, profile_names=profile_names)
+    # The solution of a stat run is on disk before the stat run is marked complete, so it survives an interruption
+    with BufferedCSVWriter(output_dir, "QLearningAgentSolutions.csv", buffer_rows=1) as solution_writer:
+        for sr, (g_curve, l_curve, best_solution, evaluated, snapshot) in results:
+            solution_writer.writerow(best_solution)
+            save_snapshot(snapshot_files, sr, snapshot)
+            evaluated_file.write_run(sr, evaluated)
+            g_learning_curve.write_run(sr, g_curve)
+            q_learning_curve.write_run(sr, l_curve)
+            remove_checkpoints([checkpoint_names[sr]])
+
+
+def gridworld_global(gw, n_agents, stat_runs, n_epochs, n_steps, workers=1, seed=None, output_dir="Output_Data/",
+                     backend="numpy", eval_every=1, resume=False, checkpoint_every=0, save_snapshots=None,
+                     profile=False):
+    """
+    Train multiagent team on Gridworld using global reward as feedback
+    """
+    save_snapshots = use_snapshots(gw, save_snapshots)
+    seed = get_base_seed(seed, output_dir, "Global_Rewards", resume)
+    metadata = curve_metadata(gw, "global", stat_runs, n_epochs, n_steps, seed, backend, eval_every)
+    train_and_save_curves(gw, stat_runs, workers, seed, output_dir, "Global_Rewards", metadata, resume,
+                          save_snapshots, profile, n_epochs, n_steps, "global", None, None, select_backend(backend),
+                          eval_every, checkpoint_every)
+
+
+def gridworld_difference(gw, n_agents, stat_runs, n_epochs, n_steps, workers=1, seed=None, output_dir="Output_Data/",
+                         backend="numpy", eval_every=1, resume=False, checkpoint_every=0, save_snapshots=None,
+                         profile=False):
+    """
+    Train multiagent team on Gridworld using difference reward as feedback
+    """
+    save_snapshots = use_snapshots(gw, save_snapshots)
+    seed = get_base_seed(seed, output_dir, "Difference_Rewards", resume)
+    metadata = curve_metadata(gw, "difference", stat_runs, n_epochs, n_steps, seed, backend, eval_every)
+    train_and_save_curves(gw, stat_runs, workers, seed, output_dir, "Difference_Rewards", metadata, resume,
+                          save_snapshots, profile, n_epochs, n_steps, "difference", None, None, select_backend(backend),
+                          eval_every, checkpoint_every)
+
+
+def gridworld_pbrs(gw, n_agents, stat_runs, n_epochs, n_steps, ptype, workers=1, seed=None, output_dir="Output_Data/",
+                   backend="numpy", eval_every=1, resume=False, checkpoint_every=0, save_snapshots=None,
+                   profile=False):
+    """
+    Train multiagent team on Gridworld using potential-based reward shaping
+    """
+    save_snapshots = use_snapshots(gw, save_snapshots)
+    seed = get_base_seed(seed, output_dir, "PBRS_Rewards", resume)
+    metadata = curve_metadata(gw, "global", stat_runs, n_epochs, n_steps, seed, backend, eval_every, ptype=ptype)
+    team_potentials = cached_team_potentials(gw, n_agents, n_steps, ptype)
+    train_and_save_curves(gw, stat_runs, workers, seed, output_dir, "PBRS_Rewards", metadata, resume,
+                          save_snapshots, profile, n_epochs, n_steps, "global", None, team_potentials,
+                          select_backend(backend), eval_every, checkpoint_every)
+
+
+def gridworld_cfl(gw, n_agents, stat_runs, n_epochs, n_steps, counterfactuals, workers=1, seed=None,
+                  output_dir="Output_Data/", backend="numpy", eval_every=1, resume=False, checkpoint_every=0,
+                  save_snapshots=None, profile=False):
+    """
+    Train multiagent team on Gridworld using CFL difference rewards as feedback
+    """
+    save_snapshots = use_snapshots(gw, save_snapshots)
+    seed = get_base_seed(seed, output_dir, "CFL_Rewards", resume)
+    metadata = curve_metadata(gw, "cfl", stat_runs, n_epochs, n_steps, seed, backend, eval_every)
+    train_and_save_curves(gw, stat_runs, workers, seed, output_dir, "CFL_Rewards", metadata, resume,
+                          save_snapshots, profile, n_epochs, n_steps, "cfl", counterfactuals, None,
+                          select_backend(backend), eval_every, checkpoint_every)
+
+
+def gridworld_drip(gw, n_agents, stat_runs, n_epochs, n_steps, ptype, workers=1, seed=None, output_dir="Output_Data/",
+                   backend="numpy", eval_every=1, resume=False, checkpoint_every=0, save_snapshots=None,
+                   profile=False):
+    """
+    Train multiagent team on Gridworld using difference reward + PBRS as feedback
+    """
+    save_snapshots = use_snapshots(gw, save_snapshots)
+    seed = get_base_seed(seed, output_dir, "DRIP_Rewards", resume)
+    metadata = curve_metadata(gw, "difference", stat_runs, n_epochs, n_steps, seed, backend, eval_every, ptype=ptype)
+    team_potentials = cached_team_potentials(gw, n_agents, n_steps, ptype)
+    train_and_save_curves(gw, stat_runs, workers, seed, output_dir, "DRIP_Rewards", metadata, resume,
+                          save_snapshots, profile, n_epochs, n_steps, "difference", None, team_potentials,
+                          select_backend(backend), eval_every, checkpoint_every)
+
+
+def gridworld_cflp(gw, n_agents, stat_runs, n_epochs, n_steps, counterfactuals, ptype, workers=1, seed=None,
+                   output_dir="Output_Data/", backend="numpy", eval_every=1, resume=False, checkpoint_every=0,
+                   save_snapshots=None, profile=False):
+    """
+    Train multiagent team on Gridworld using CFL + PBRS rewards as feedback
+    """
+    save_snapshots = use_snapshots(gw, save_snapshots)
+    seed = get_base_seed(seed, output_dir, "CFLP_Rewards", resume)
+    metadata = curve_metadata(gw, "cfl", stat_runs, n_epochs, n_steps, seed, backend, eval_every, ptype=ptype)
+    team_potentials = cached_team_potentials(gw, n_agents, n_steps, ptype)
+    train_and_save_curves(gw, stat_runs, workers, seed, output_dir, "CFLP_Rewards", metadata, resume,
+                          save_snapshots, profile, n_epochs, n_steps, "cfl", counterfactuals, team_potentials,
+                          select_backend(backend), eval_every, checkpoint_every)
+
+
+def gridworld_batched(gw, n_agents, stat_runs, n_epochs, n_steps, reward_type, counterfactuals=None, ptype=None,
+                      alphas=(0.1,), epsilons=(0.15,), discounts=(0.9,), seed=None, output_dir="Output_Data/",
+                      file_name="Batched_Rewards", eval_every=1):
+    """
+    Train every stat run of every (alpha, epsilon, discount) setting as one batched simulation. With a single setting
+    the saved learning curves have the usual (stat_runs, n_epochs) shape, otherwise they are saved with shape
+    (n_settings, stat_runs, n_epochs) and the settings are recorded in the JSON sidecar. Stat run sr of every setting
+    explores with the random streams of seed + sr, like stat run sr of the other trainers
+    """
+    settings = list(itertools.product(alphas, epsilons, discounts))
+    batch_settings = np.repeat(np.array(settings), stat_runs, axis=0)
+    team_potentials = None
+    if ptype is not None:
+        team_potentials = cached_team_potentials(gw, n_agents, n_steps, ptype)
+
+    if seed is None:
+        seed = random.randrange(2**31)
+    batch_seeds = np.tile(seed + np.arange(stat_runs), len(settings)).tolist()
+    g_learning_curves, evaluated = train_batched_stat_runs(gw, len(batch_settings), n_epochs, n_steps, reward_type,
+                                                           counterfactuals, team_potentials, batch_settings[:, 0],
+                                                           batch_settings[:, 1], batch_settings[:, 2], eval_every,
+                                                           batch_seeds)
+    agent_learning_curves = g_learning_curves.reshape(len(settings), stat_runs, n_epochs)
+
+    metadata = curve_metadata(gw, reward_type, stat_runs, n_epochs, n_steps, seed, "batched", eval_every, ptype=ptype,
+                              settings=[list(setting) for setting in settings])
+    evaluated_file = open_evaluated_file(stat_runs, output_dir, file_name, metadata, False)
+    for sr in range(stat_runs):
+        evaluated_file.write_run(sr, evaluated)  # Every stat run and setting is evaluated on the same epochs
+    if len(settings) == 1:
+        curve_file = StreamingArrayFile(output_dir, file_name, (stat_runs, n_epochs), metadata=metadata)
+        for sr in range(stat_runs):
+            curve_file.write_run(sr, agent_learning_curves[0, sr])
+    else:
+        curve_file = StreamingArrayFile(output_dir, file_name, agent_learning_curves.shape, run_axis=1,
+                                        metadata=metadata)
+        for sr in range(stat_runs):
+            curve_file.write_run(sr, agent_learning_curves[:, sr])
+
+
+if __name__ == "__main__":
+    width = 20
+    height = 20
+    n_agents = 20
+    n_targets = n_agents
+    stat_runs = 30
+    n_epochs = 5000
+    n_steps = 30
+    workers = 1  # Number of worker processes used for stat runs
+    seed = None  # Base seed for stat runs (stat run sr is seeded with seed + sr)
+    backend = "numpy"  # numpy, or jit to run epochs in the compiled episode kernel (requires Numba)
+    eval_every = 1  # Test the greedy solution every eval_every epochs
+    checkpoint_every = 100  # Save the training state every checkpoint_every epochs (0 disables checkpoints)
+    resume = False  # Continue interrupted training from the saved results and checkpoints
+
+    gw = GridWorld(width, height)
+    gw.load_configuration(n_agents, n_targets)  # Load GridWorld configuration from CSV files
+
+    print("Running Gridworld with Q-Learning Local Reward")
+    q_learning_gridworld(gw, n_agents, stat_runs, n_epochs, n_steps, workers=workers, seed=seed, backend=backend,
+                         eval_every=eval_every, resume=resume, checkpoint_every=checkpoint_every)
+    print('\n')
+
+    print("Running Gridworld with Global Reward")
+    gridworld_global(gw, n_agents, stat_runs, n_epochs, n_steps, workers=workers, seed=seed, backend=backend,
+                     eval_every=eval_every, resume=resume, checkpoint_every=checkpoint_every)
+    print('\n')
+
+    print("Running Gridworld with Difference Reward")
+    gridworld_difference(gw, n_agents, stat_runs, n_epochs, n_steps, workers=workers, seed=seed, backend=backend,
+                         eval_every=eval_every, resume=resume, checkpoint_every=checkpoint_every)
+    print('\n')
+
+    print("Running Gridworld with PBRS")
+    ptype = "custom"  # exploration, target_prox, target_agent, or custom
+    gridworld_pbrs(gw, n_agents, stat_runs, n_epochs, n_steps, ptype, workers=workers, seed=seed, backend=backend,
+                   eval_every=eval_every, resume=resume, checkpoint_every=checkpoint_every)
+    print('\n')
+
+    print("Running Gridworld with CFL")
+    ctype = "split"  # distance, split, assign, or value
+    counterfactuals = cached_counterfactuals(gw, ctype, 4)
+    gridworld_cfl(gw, n_agents, stat_runs, n_epochs, n_steps, counterfactuals, workers=workers, seed=seed,
+                  backend=backend, eval_every=eval_every, resume=resume, checkpoint_every=checkpoint_every)
+    print('\n')
+
+    print("Running Gridworld with DRiP")
+    ptype = "exploration"  # exploration, target_prox, target_agent, or custom
+    gridworld_drip(gw, n_agents, stat_runs, n_epochs, n_steps, ptype, workers=workers, seed=seed, backend=backend,
+                   eval_every=eval_every, resume=resume, checkpoint_every=checkpoint_every)
+    print('\n')
+
+    print("Running Gridworld with CFL-P")
+    ptype = "exploration"  # exploration, target_prox, target_agent, or custom
+    ctype = "split"  # distance, split, assign, or value
+    counterfactuals = cached_counterfactuals(gw, ctype, 5)
+    gridworld_cflp(gw, n_agents, stat_runs, n_epochs, n_steps, counterfactuals, ptype, workers=workers, seed=seed,
+                   backend=backend, eval_every=eval_every, resume=resume, checkpoint_every=checkpoint_every)
+    print('\n')
@@ -0,0 +1,262 @@
+from gridworld import GridWorld, import_csv_world
+from world_cache import cached_counterfactuals
+from run_gridworld import q_learning_gridworld, gridworld_global, gridworld_difference, gridworld_pbrs
+from run_gridworld import gridworld_cfl, gridworld_drip, gridworld_cflp
+import random
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+# Result file written by each method and whether the method uses a potential type (ptype) or counterfactual type (ctype)
+sweep_methods = {
+    "q_learning": {"result": "QLearning_GReward", "ptype": False, "ctype": False},
+    "global": {"result": "Global_Rewards", "ptype": False, "ctype": False},
+    "difference": {"result": "Difference_Rewards", "ptype": False, "ctype": False},
+    "pbrs": {"result": "PBRS_Rewards", "ptype": True, "ctype": False},
+    "cfl": {"result": "CFL_Rewards", "ptype": False, "ctype": True},
+    "drip": {"result": "DRIP_Rewards", "ptype": True, "ctype": False},
+    "cflp": {"result": "CFLP_Rewards", "ptype": True, "ctype": True}
+}
+
+config_file_names = ['Target_Config.csv', 'Agent_Config.csv', 'Wall_Config.csv']  # CSV world configuration files
+unhashed_keys = ["checkpoint_every"]  # Job parameters that do not change results (and are left out of config hashes)
+
+
+def expand_sweep(sweep):
+    """
+    Expand a sweep specification into a list of jobs. Entries of the sweep that are lists are swept over, every
+    other entry is shared by all jobs. Jobs that only differ in parameters their method does not use are merged
+    """
+    grid_keys = ["method", "ptype", "ctype", "n_agents", "size", "n_steps", "seed"]
+    grid = [sweep[key] if isinstance(sweep[key], list) else [sweep[key]] for key in grid_keys]
+    shared = {key: val for key, val in sweep.items() if key not in grid_keys}
+
+    jobs = []
+    for values in itertools.product(*grid):
+        job = dict(zip(grid_keys, values))
+        job.update(shared)
+        if not sweep_methods[job["method"]]["ptype"]:
+            job["ptype"] = None
+        if not sweep_methods[job["method"]]["ctype"]:
+            job["ctype"] = None
+            job["n_split"] = None
+        if job not in jobs:
+            jobs.append(job)
+
+    return jobs
+
+
+def get_job_dirs(job):
+    """
+    Directories holding the world configuration and results of a job (the {na}Agents layout read by the plotters)
+    """
+    results_dir = job["results_dir"].format(**job)
+    agent_dir = os.path.join(results_dir, f'{job["n_agents"]}Agents')
+
+    return os.path.join(agent_dir, 'World_Config'), os.path.join(agent_dir, 'Output_Data')
+
+
+def create_job_world(job):
+    """
+    Create the world configuration used by a job if it does not exist yet (shared by all jobs with the same
+    team size and results directory). The CSV configuration is also saved as a binary world file that jobs load from
+    """
+    config_dir, output_dir = get_job_dirs(job)
+    world_file = os.path.join(config_dir, 'World.npz')
+    if not os.path.exists(os.path.join(config_dir, 'Agent_Config.csv')):
+        random.seed(job["world_seed"])
+        gw = GridWorld(job["size"], job["size"])
+        gw.create_center_world(job["n_agents"], job["n_agents"], job["size"] - 1, config_dir)
+
+    # Convert the CSV configuration again if it was edited after the world file was saved
+    config_files = [os.path.join(config_dir, file_name) for file_name in config_file_names]
+    config_mtime = max(os.path.getmtime(file_name) for file_name in config_files if os.path.exists(file_name))
+    if not os.path.exists(world_file) or os.path.getmtime(world_file) < config_mtime:
+        import_csv_world(config_dir, world_file, job["size"], job["size"], job["n_agents"], job["n_agents"])
+
+
+def get_config_hash(job):
+    """
+    Hash the job parameters together with the contents of the world configuration the job is trained on
+    """
+    config_dir, output_dir = get_job_dirs(job)
+    hashed_job = {key: val for key, val in job.items() if key not in unhashed_keys}
+    config_hash = hashlib.sha256(json.dumps(hashed_job, sort_keys=True).encode())
+    for file_name in config_file_names:
+        if not os.path.exists(os.path.join(config_dir, file_name)):  # Only worlds with walls have a wall file
+            continue
+        with open(os.path.join(config_dir, file_name), 'rb') as config_file:
+            config_hash.update(config_file.read())
+
+    return config_hash.hexdigest()
+
+
+def get_marker_file(job):
+    """
+    File recording the configuration hash of the job that writes a result (kept apart from the result's own JSON
+    sidecar)
+    """
+    config_dir, output_dir = get_job_dirs(job)
+
+    return os.path.join(output_dir, sweep_methods[job["method"]]["result"]) + '_Sweep.json'
+
+
+def load_job_marker(job):
+    """
+    Load the marker of the last job that was started on a result, or None if no job was started on it
+    """
+    marker_file = get_marker_file(job)
+    if not os.path.exists(marker_file):
+        return None
+
+    with open(marker_file) as json_file:
+        return json.load(json_file)
+
+
+def write_job_marker(job, config_hash, complete):
+    """
+    Write the marker of a job atomically so an interrupted job is never mistaken for a complete one
+    """
+    marker_file = get_marker_file(job)
+    with open(marker_file + '.tmp', 'w') as json_file:
+        json.dump({"config_hash": config_hash, "complete": complete, "job": job}, json_file, indent=2)
+    os.replace(marker_file + '.tmp', marker_file)
+
+
+def job_is_complete(job, config_hash):
+    """
+    Check if the results of a job already exist for an identical configuration
+    """
+    config_dir, output_dir = get_job_dirs(job)
+    result_file = os.path.join(output_dir, sweep_methods[job["method"]]["result"])
+    marker = load_job_marker(job)
+    if not os.path.exists(result_file + '.npy') or marker is None:
+        return False
+
+    return marker["config_hash"] == config_hash and marker.get("complete", True)  # Older markers mean complete
+
+
+def run_job(job, config_hash):
+    """
+    Train a single job and record its configuration hash next to its result once training is complete. A job that
+    was interrupted continues from its completed stat runs and checkpoints
+    """
+    config_dir, output_dir = get_job_dirs(job)
+    n_agents = job["n_agents"]
+
+    # Only results started by this same job are resumed, results of other configurations are overwritten
+    marker = load_job_marker(job)
+    resume = marker is not None and marker["config_hash"] == config_hash
+    os.makedirs(output_dir, exist_ok=True)
+    write_job_marker(job, config_hash, complete=False)
+
+    gw = GridWorld(job["size"], job["size"])
+    gw.load_world(os.path.join(config_dir, 'World.npz'), n_agents, n_agents)
+    train_args = (gw, n_agents, job["stat_runs"], job["n_epochs"], job["n_steps"])
+    train_kwargs = {"seed": job["seed"], "output_dir": output_dir, "resume": resume,
+                    "checkpoint_every": job.get("checkpoint_every", 0)}
+
+    method = job["method"]
+    if method == "q_learning":
+        q_learning_gridworld(*train_args, **train_kwargs)
+    elif method == "global":
+        gridworld_global(*train_args, **train_kwargs)
+    elif method == "difference":
+        gridworld_difference(*train_args, **train_kwargs)
+    elif method == "pbrs":
+        gridworld_pbrs(*train_args, job["ptype"], **train_kwargs)
+    elif method == "cfl":
+        counterfactuals = cached_counterfactuals(gw, job["ctype"], job["n_split"])
+        gridworld_cfl(*train_args, counterfactuals, **train_kwargs)
+    elif method == "drip":
+        gridworld_drip(*train_args, job["ptype"], **train_kwargs)
+    elif method == "cflp":
+        counterfactuals = cached_counterfactuals(gw, job["ctype"], job["n_split"])
+        gridworld_cflp(*train_args, counterfactuals, job["ptype"], **train_kwargs)
+
+    write_job_marker(job, config_hash, complete=True)
+
+    return job
+
+
+def run_sweep(sweep, workers=1):
+    """
+    Run every job in a sweep over a pool of worker processes, skipping jobs whose results already exist
+    """
+    jobs = expand_sweep(sweep)
+
+    # Jobs writing to the same result file would overwrite each other's results
+    result_files = {}
+    for job in jobs:
+        config_dir, output_dir = get_job_dirs(job)
+        result_file = os.path.join(output_dir, sweep_methods[job["method"]]["result"])
+        if result_file in result_files:
+            raise ValueError(f'Jobs {result_files[result_file]} and {job} both write to {result_file}, '
+                             f'include the swept parameters in results_dir (e.g. "{{size}}x{{size}}/{{ptype}}")')
+        result_files[result_file] = job
+
+    for job in jobs:
+        create_job_world(job)
+
+    pending = []
+    for job in jobs:
+        config_hash = get_config_hash(job)
+        if job_is_complete(job, config_hash):
+            print(f'Skipping completed job: {job["method"]}, {job["n_agents"]} agents, {job["size"]}x{job["size"]}')
+        else:
+            pending.append((job, config_hash))
+
+    print(f'Running {len(pending)} of {len(jobs)} jobs')
+    failed = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_job, job, config_hash): job for job, config_hash in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    future.result()
+                    print(f'Finished job: {job["method"]}, {job["n_agents"]} agents, {job["size"]}x{job["size"]}')
+                except Exception as err:
+                    # A failed job does not stop the rest of the sweep and is re-run when the sweep is resumed
+                    print(f'Failed job: {job["method"]}, {job["n_agents"]} agents, {job["size"]}x{job["size"]} '
+                          f'({err!r})')
+                    failed.append(job)
+    else:
+        for job, config_hash in pending:
+            try:
+                run_job(job, config_hash)
+                print(f'Finished job: {job["method"]}, {job["n_agents"]} agents, {job["size"]}x{job["size"]}')
+            except Exception as err:
+                print(f'Failed job: {job["method"]}, {job["n_agents"]} agents, {job["size"]}x{job["size"]} ({err!r})')
+                failed.append(job)
+
+    return failed
+
+
+if __name__ == "__main__":
+    sweep = {
+        "method": ["q_learning", "global", "difference", "pbrs", "cfl", "drip", "cflp"],
+        "ptype": "exploration",  # exploration, target_prox, target_agent, or custom
+        "ctype": "split",  # distance, split, assign, or value
+        "n_split": 4,  # Number of agents assigned to close targets by split counterfactuals
+        "n_agents": [10, 12, 14, 16, 18, 20],
+        "size": 20,
+        "n_steps": 30,
+        "seed": 0,
+        "world_seed": 0,  # Seed used to create world configurations that do not exist yet
+        "n_epochs": 5000,
+        "stat_runs": 30,
+        "checkpoint_every": 100,  # Save the training state every checkpoint_every epochs so interrupted jobs resume
+        "results_dir": "{size}x{size}"  # Formatted with the job parameters
+    }
+    workers = os.cpu_count()
+
+    if len(sys.argv) > 1:  # Optionally load the sweep from a JSON file
+        with open(sys.argv[1]) as json_file:
+            sweep = json.load(json_file)
+
+    run_sweep(sweep, workers)
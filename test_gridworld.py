@@ -0,0 +1,90 @@
+from gridworld import GridWorld
+from world_generator import generate_world
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("width, height", [(8, 5), (5, 8), (6, 6)])
+def test_step_matches_coordinate_moves(width, height):
+    """
+    Every cell has its own state id and step moves agents like plain coordinate movement (clamped at the boundaries),
+    including on grids that are not square
+    """
+    gw = GridWorld(width, height)
+    cells = [[x, y] for x in range(width) for y in range(height)]
+    states = gw.get_states(cells)
+    assert len(np.unique(states)) == width*height
+    assert states.min() == 0 and states.max() == gw.n_states - 1
+    assert np.array_equal(gw.state_coords[states], cells)
+
+    gw.targets = []
+    gw.create_target_grid()
+    for x, y in cells:
+        for action, (dx, dy) in enumerate(gw.moves):
+            new_x, new_y = x + dx, y + dy
+            if not (0 <= new_x < width and 0 <= new_y < height):
+                new_x, new_y = x, y
+            reward, new_loc = gw.step([x, y], action)
+            assert new_loc == [new_x, new_y]
+            assert gw.next_state[gw.get_states([x, y]), action] == gw.get_states([new_x, new_y])
+
+
+def recount_g_reward(gw):
+    """
+    Global reward counted the way the original calculate_g_reward did, from the agent locations alone
+    """
+    captured_value = 0
+    for t_id, t_loc in enumerate(gw.targets):
+        if any(list(t_loc) == gw.agents[ag].loc for ag in gw.agents):
+            captured_value += gw.target_values[t_id]
+
+    return (captured_value/np.sum(gw.target_values))*100
+
+
+def test_g_reward_follows_agent_locations():
+    """
+    Agents moved by assigning their locations (the way step is used on a single agent) keep the global reward in
+    sync with a brute-force recount
+    """
+    rng = np.random.default_rng(0)
+    gw = GridWorld(7, 5)
+    gw.targets, agent_locs = generate_world(7, 5, 8, 6, seed=0)
+    gw.assign_target_values(6)
+    gw.create_agents(agent_locs)
+
+    for t in range(200):
+        ag = f'A{rng.integers(8)}'
+        if t % 10 == 0:
+            gw.agents[ag].loc = gw.targets[rng.integers(6)]  # Jump straight onto a target
+        else:
+            reward, gw.agents[ag].loc = gw.step(gw.agents[ag].loc, rng.integers(5))
+        assert gw.calculate_g_reward() == recount_g_reward(gw)
+
+    gw.reset_agents()
+    assert [gw.agents[ag].loc for ag in gw.agents] == [list(loc) for loc in agent_locs]
+    assert gw.calculate_g_reward() == recount_g_reward(gw)
+    with pytest.raises(ValueError):
+        gw.agents['A0'].loc = [7, 0]
+
+
+def test_g_reward_with_float_target_values():
+    """
+    The global reward equals the original recount exactly for float target values, after any number of moves and for
+    a single team as well as a batch of teams
+    """
+    rng = np.random.default_rng(1)
+    gw = GridWorld(9, 6)
+    gw.targets, agent_locs = generate_world(9, 6, 12, 16, seed=1)
+    gw.target_values = rng.uniform(0.1, 10, 16)
+    gw.create_target_grid()
+    gw.create_agents(agent_locs)
+
+    target_states = gw.get_states(gw.targets)
+    for t in range(300):
+        states = gw.get_team_states()
+        n_moved = rng.integers(1, 4)
+        states[rng.choice(12, n_moved, replace=False)] = rng.choice(target_states, n_moved)
+        _, states = gw.step_states(states, rng.integers(5, size=12))
+        gw.move_team_states(states)
+        assert gw.calculate_g_reward() == recount_g_reward(gw)
+        assert gw.calculate_batch_g_reward(gw.get_batch_occupancy(states[None])[1])[0] == recount_g_reward(gw)
@@ -0,0 +1,106 @@
+from pbrs import create_team_potentials
+from cfl import create_counterfactuals
+import numpy as np
+import hashlib
+import os
+
+
+cache_version = 2  # Increment when the way cached arrays are computed changes (2: states indexed by x + width*y)
+default_cache_dir = 'World_Cache'
+default_max_bytes = 2**30  # Total size of cached arrays before the least recently used ones are evicted
+
+
+def world_key(gw, name, *params, include_agents=True, include_values=True):
+    """
+    Create a cache key from a hash of the world configuration and the parameters used to derive an array
+    """
+    key_hash = hashlib.sha256(repr((cache_version, name, gw.width, gw.height, params)).encode())
+    key_hash.update(np.asarray(gw.targets, dtype=np.int64).tobytes())
+    if gw.walls:  # Worlds without walls keep the keys they had before walls were added
+        key_hash.update(b'walls' + np.asarray(gw.walls, dtype=np.int64).tobytes())
+    if include_values:
+        key_hash.update(np.asarray(gw.target_values, dtype=np.float64).tobytes())
+    if include_agents:
+        agent_locs = [gw.agents[ag].initial_position for ag in gw.agents]
+        key_hash.update(np.asarray(agent_locs, dtype=np.int64).tobytes())
+
+    return f'{name}_{key_hash.hexdigest()[:32]}'
+
+
+def evict_cache(cache_dir, max_bytes, keep=None):
+    """
+    Remove the least recently used arrays until the cache fits within max_bytes
+    """
+    cache_files = []
+    for file_name in os.listdir(cache_dir):
+        if file_name.endswith('.npy') and file_name != keep:
+            path_name = os.path.join(cache_dir, file_name)
+            cache_files.append((os.path.getmtime(path_name), os.path.getsize(path_name), path_name))
+
+    total_bytes = sum(size for mtime, size, path_name in cache_files)
+    if keep is not None:
+        total_bytes += os.path.getsize(os.path.join(cache_dir, keep))
+
+    for mtime, size, path_name in sorted(cache_files):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path_name)
+        except FileNotFoundError:  # Already evicted by another process
+            pass
+        total_bytes -= size
+
+
+def load_cached_array(key, create_array, cache_dir=default_cache_dir, max_bytes=default_max_bytes):
+    """
+    Memory-map a cached array, or create it with create_array and add it to the cache if it does not exist yet
+    """
+    if cache_dir is None:  # Caching disabled
+        return create_array()
+
+    if not os.path.exists(cache_dir):  # If cache directory does not exist, create it
+        os.makedirs(cache_dir, exist_ok=True)
+
+    file_name = f'{key}.npy'
+    path_name = os.path.join(cache_dir, file_name)
+    if os.path.exists(path_name):
+        os.utime(path_name)  # Mark as recently used
+        return np.load(path_name, mmap_mode='r')
+
+    # Write to a temporary file first so other processes never see a partially written array
+    array = np.asarray(create_array())
+    tmp_name = os.path.join(cache_dir, f'{key}.{os.getpid()}.tmp')
+    with open(tmp_name, 'wb') as npy_file:
+        np.save(npy_file, array)
+    os.replace(tmp_name, path_name)
+    evict_cache(cache_dir, max_bytes, keep=file_name)
+
+    return np.load(path_name, mmap_mode='r')
+
+
+def cached_target_values(gw, cache_dir=default_cache_dir, max_bytes=default_max_bytes):
+    """
+    Target values of the world (only depend on target locations and world size)
+    """
+    def create_array():
+        gw.assign_target_values(len(gw.targets))
+        return gw.target_values
+
+    key = world_key(gw, 'target_values', include_agents=False, include_values=False)
+    return load_cached_array(key, create_array, cache_dir, max_bytes)
+
+
+def cached_team_potentials(gw, n_agents, n_steps, ptype, cache_dir=default_cache_dir, max_bytes=default_max_bytes):
+    """
+    PBRS potentials of every agent as an (n_agents, n_states) array
+    """
+    key = world_key(gw, 'potentials', n_agents, n_steps, ptype)
+    return load_cached_array(key, lambda: create_team_potentials(gw, n_agents, n_steps, ptype), cache_dir, max_bytes)
+
+
+def cached_counterfactuals(gw, ctype, n_agents, cache_dir=default_cache_dir, max_bytes=default_max_bytes):
+    """
+    CFL counterfactuals as an (n_agents, n_targets) boolean array
+    """
+    key = world_key(gw, 'counterfactuals', ctype, n_agents)
+    return load_cached_array(key, lambda: create_counterfactuals(gw, ctype, n_agents), cache_dir, max_bytes)
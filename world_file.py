@@ -0,0 +1,43 @@
+import numpy as np
+import os
+
+
+world_format_version = 1  # Increment when the arrays stored in world files change
+world_keys = ["width", "height", "targets", "target_values", "agents", "walls"]
+
+
+def save_world_file(path, width, height, targets, target_values, agents, walls=()):
+    """
+    Save a world configuration (dimensions, target locations and values, agent starting locations, and walls) as a
+    single uncompressed .npz file. The file is written atomically
+    """
+    dir_name = os.path.dirname(path)
+    if dir_name and not os.path.exists(dir_name):  # If world directory does not exist, create it
+        os.makedirs(dir_name, exist_ok=True)
+
+    arrays = {
+        "format_version": np.int64(world_format_version),
+        "width": np.int64(width),
+        "height": np.int64(height),
+        "targets": np.asarray(targets, dtype=np.int32).reshape(-1, 2),
+        "target_values": np.asarray(target_values, dtype=np.float64),
+        "agents": np.asarray(agents, dtype=np.int32).reshape(-1, 2),
+        "walls": np.asarray(walls, dtype=np.int32).reshape(-1, 2)
+    }
+    tmp_name = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_name, 'wb') as npz_file:
+        np.savez(npz_file, **arrays)
+    os.replace(tmp_name, path)
+
+
+def load_world_file(path):
+    """
+    Load the arrays of a world file saved by save_world_file
+    """
+    with np.load(path) as world_file:
+        version = int(world_file["format_version"])
+        if version > world_format_version:
+            raise ValueError(f'{path} uses world format version {version}, this version only reads up to '
+                             f'{world_format_version}')
+
+        return {key: world_file[key] for key in world_keys}
@@ -0,0 +1,93 @@
+import numpy as np
+import random
+
+
+def get_world_rng(seed=None):
+    """
+    Random number generator used to place targets and agents. Without a seed, the seed is drawn from Python's random
+    module so random.seed still makes world creation reproducible
+    """
+    if seed is None:
+        seed = random.randrange(2**32)
+
+    return np.random.default_rng(seed)
+
+
+def get_cell_grid(width, height):
+    """
+    Return the x and y coordinates of every cell as (width, height) arrays
+    """
+    return np.meshgrid(np.arange(width), np.arange(height), indexing='ij')
+
+
+def check_cell_count(valid_cells, n_cells, description):
+    """
+    Raise an error before sampling if there are fewer valid cells than objects to place in them
+    """
+    n_valid = int(np.count_nonzero(valid_cells))
+    if n_valid < n_cells:
+        raise ValueError(f'Cannot place {n_cells} {description}: only {n_valid} cells satisfy the constraints')
+
+
+def sample_cells(rng, valid_cells, n_cells):
+    """
+    Sample n_cells distinct cells from a (width, height) mask of valid cells. Returns a list of [x, y] coordinates
+    """
+    flat_cells = np.flatnonzero(valid_cells)
+    chosen = rng.choice(flat_cells, n_cells, replace=False)
+    x, y = np.unravel_index(chosen, valid_cells.shape)
+
+    return np.stack((x, y), axis=1).tolist()
+
+
+def generate_world(width, height, n_agents, n_targets, seed=None, wall_grid=None):
+    """
+    Place targets and agents uniformly at random on distinct cells that are not walls (agents do not start on top of
+    targets). Returns the target and agent locations
+    """
+    free_cells = np.ones((width, height), dtype=bool)
+    if wall_grid is not None:
+        free_cells &= ~wall_grid
+    check_cell_count(free_cells, n_targets + n_agents, "targets and agents")
+
+    rng = get_world_rng(seed)
+    targets = sample_cells(rng, free_cells, n_targets)
+    target_locs = np.asarray(targets, dtype=int).reshape(-1, 2)
+    free_cells[target_locs[:, 0], target_locs[:, 1]] = False
+    agent_locs = sample_cells(rng, free_cells, n_agents)
+
+    return targets, agent_locs
+
+
+def generate_center_world(width, height, n_agents, n_targets, min_dist_center, seed=None, wall_grid=None):
+    """
+    Place up to four distant targets at least min_dist_center from the center of the world and low value targets
+    closer to the center (but not on it and away from the edges), with every agent starting in the center. Returns the
+    target and agent locations
+    """
+    center_x = int(width/2)
+    center_y = int(height/2)
+    x, y = get_cell_grid(width, height)
+    dist_to_center = np.abs(x - center_x) + np.abs(y - center_y)
+    free_cells = np.ones((width, height), dtype=bool)
+    if wall_grid is not None:
+        free_cells &= ~wall_grid
+
+    n_distant = min(4, n_targets)
+    distant_cells = free_cells & (dist_to_center >= min_dist_center)
+    inner_cells = (x >= 2) & (x <= width - 2) & (y >= 2) & (y <= height - 2)
+    close_cells = free_cells & inner_cells & (dist_to_center < min_dist_center - 3) & (dist_to_center > 0)
+
+    # Check every constraint before placing anything
+    check_cell_count(distant_cells, n_distant, f"distant targets (at least {min_dist_center} from the center)")
+    check_cell_count(close_cells, n_targets - n_distant, f"low value targets (closer than {min_dist_center - 3} to "
+                                                         f"the center)")
+    if not free_cells[center_x, center_y]:
+        raise ValueError(f'Cannot place agents in the center of the world, [{center_x}, {center_y}] is a wall')
+
+    rng = get_world_rng(seed)
+    targets = sample_cells(rng, distant_cells, n_distant)
+    targets += sample_cells(rng, close_cells, n_targets - n_distant)
+    agent_locs = [[center_x, center_y] for a in range(n_agents)]
+
+    return targets, agent_locs